@@ -27,7 +27,7 @@ from model_service import create_model_service
 from parsers import parse_answer_evaluation
 from parsers import parse_educational_textbook, parse_educational_story
 from dotenv import load_dotenv
-from xapi_logger import xapi_logger
+from xapi_logger import xapi_logger, invalidate_actor
 from feedback_queue import (
     initialize_feedback_queue, 
     stop_feedback_queue, 
@@ -619,6 +619,7 @@ async def lifespan(app: FastAPI):
     await stop_file_watcher()
     await stop_feedback_queue()
     logger.info("Feedback queue system stopped")
+    await sync_client.aclose()
     main_event_loop = None
 
 # Create FastAPI app with lifespan
@@ -756,6 +757,9 @@ def save_profile_json(profile: StudentProfile):
         # Write to JSON file
         with open(profile_file, 'w', encoding='utf-8') as f:
             json.dump(profile_data, f, indent=2, ensure_ascii=False)
+        
+        # New statements must carry the new student identity
+        invalidate_actor()
             
         # DEBUG: Verify file was written where expected
         logger.info(f"Successfully saved student profile to {profile_file.absolute()} for student {profile.id}")
@@ -2889,7 +2893,7 @@ async def check_tutor_service():
             current_status = False
         else:
             logger.info(f"API: Checking tutor service availability at {sync_client.tutor_url}")
-            current_status = sync_client.discover_tutor_service()
+            current_status = await sync_client.discover_tutor_service()
         
         # Check for status change and emit SSE event if changed
         if previous_sync_status is not None and previous_sync_status != current_status:
@@ -3007,7 +3011,7 @@ async def sync_to_tutor(request: dict = None):
     """Synchronize student data to tutor service (with optional delta sync)"""
     try:
         # Check if tutor service is available
-        if not sync_client.discover_tutor_service():
+        if not await sync_client.discover_tutor_service():
             raise HTTPException(status_code=503, detail="Tutor service not available")
         
         # Extract last_sync timestamp from request if provided
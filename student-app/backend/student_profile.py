@@ -11,14 +11,26 @@ Priority order:
 import json
 import logging
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, NamedTuple, Optional
 
-def get_current_student_profile() -> Dict[str, Any]:
+
+class ProfileRecord(NamedTuple):
+    """Immutable student profile (field order matches the profile dict)"""
+    student_name: str
+    student_age: str
+    student_course: str
+    student_interests: str
+    language: str
+    student_id: str
+    completed_onboarding: bool
+
+
+def load_student_profile() -> Optional[ProfileRecord]:
     """
-    Get the current student profile from profile.json only
+    Load the current student profile from profile.json as an immutable record
     
     Returns:
-        dict: Student profile with consistent structure or None if no profile exists
+        ProfileRecord, or None if no profile exists
     """
     try:
         # Only try to load from profile.json
@@ -33,15 +45,15 @@ def get_current_student_profile() -> Dict[str, Any]:
                 
             # Convert profile.json structure to expected format
             if profile_data:
-                converted_profile = {
-                    'student_name': profile_data.get('name', 'Student'),
-                    'student_age': str(profile_data.get('age', 12)),
-                    'student_course': profile_data.get('grade', '7th grade'),
-                    'student_interests': profile_data.get('interests', 'learning'),
-                    'language': profile_data.get('language', 'English'),
-                    'student_id': profile_data.get('id', ''),
-                    'completed_onboarding': profile_data.get('completed_onboarding', False)
-                }
+                converted_profile = ProfileRecord(
+                    student_name=profile_data.get('name', 'Student'),
+                    student_age=str(profile_data.get('age', 12)),
+                    student_course=profile_data.get('grade', '7th grade'),
+                    student_interests=profile_data.get('interests', 'learning'),
+                    language=profile_data.get('language', 'English'),
+                    student_id=profile_data.get('id', ''),
+                    completed_onboarding=profile_data.get('completed_onboarding', False)
+                )
                 logging.info(f"✓ Loaded student profile from profile.json: {profile_data.get('name', 'Unknown')}")
                 logging.info(f"🔄 Converted profile structure: {converted_profile}")
                 return converted_profile
@@ -54,6 +66,17 @@ def get_current_student_profile() -> Dict[str, Any]:
     return None
 
 
+def get_current_student_profile() -> Dict[str, Any]:
+    """
+    Get the current student profile from profile.json only
+    
+    Returns:
+        dict: Student profile with consistent structure or None if no profile exists
+    """
+    profile = load_student_profile()
+    return None if profile is None else profile._asdict()
+
+
 def get_student_profile_for_content_generation(content: str) -> Dict[str, Any]:
     """
     Get student profile formatted for content generation templates
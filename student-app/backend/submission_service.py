@@ -4,6 +4,8 @@ Handles persistent storage of all challenge submissions with unique IDs
 """
 
 import json
+import os
+import concurrent.futures
 import uuid
 import shutil
 from datetime import datetime
@@ -18,11 +20,38 @@ logger = logging.getLogger(__name__)
 SUBMISSIONS_DIR = Path("content/experiment_submissions")
 SUBMISSIONS_DIR.mkdir(parents=True, exist_ok=True)
 
+# Image extensions accepted from the uploads directory (lowercase, no dot)
+_IMG_EXTS = frozenset({'jpg', 'jpeg', 'png'})
+
+# Small shared pool so multi-image submissions copy their uploads concurrently
+_COPY_POOL = concurrent.futures.ThreadPoolExecutor(max_workers=4, thread_name_prefix="submission-copy")
+
+def _fast_copy(src: str, dst: str) -> None:
+    """Copy file data only; upload metadata (mode, times, xattrs) is not needed"""
+    shutil.copyfile(src, dst)
+
+# unique_challenge_id -> str path of its submissions directory
+_CHALLENGE_DIR_CACHE: Dict[str, str] = {}
+
+def _challenge_dir(unique_challenge_id: str) -> str:
+    """Return the (cached) submissions directory for a challenge as a string path"""
+    cdir = _CHALLENGE_DIR_CACHE.get(unique_challenge_id)
+    if cdir is None:
+        cdir = _CHALLENGE_DIR_CACHE.setdefault(unique_challenge_id, str(SUBMISSIONS_DIR / unique_challenge_id))
+    return cdir
+
+# Translation table that deletes every character allowed in a UUID string
+_UUID_KEEP = str.maketrans('', '', '0123456789abcdefABCDEF-')
+
 def is_uuid_format(challenge_id: str) -> bool:
-    """Check if challenge_id is in UUID format"""
-    import re
-    uuid_pattern = r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$'
-    return bool(re.match(uuid_pattern, challenge_id, re.IGNORECASE))
+    """Check if challenge_id is in UUID format (8-4-4-4-12 hex digits)"""
+    return (
+        len(challenge_id) == 36
+        and challenge_id[8] == '-' and challenge_id[13] == '-'
+        and challenge_id[18] == '-' and challenge_id[23] == '-'
+        and challenge_id.count('-') == 4
+        and not challenge_id.translate(_UUID_KEEP)
+    )
 
 class SubmissionService:
     """Service for managing challenge submission storage"""
@@ -39,17 +68,18 @@ class SubmissionService:
         Returns:
             Next submission number (1, 2, 3, ...)
         """
-        challenge_dir = SUBMISSIONS_DIR / unique_challenge_id
+        challenge_dir = _challenge_dir(unique_challenge_id)
         
-        if not challenge_dir.exists():
+        if not os.path.exists(challenge_dir):
             logger.info(f"First submission for challenge {unique_challenge_id}")
             return 1
         
         # Find existing submission folders (01, 02, 03, ...)
-        existing_submissions = [
-            int(d.name) for d in challenge_dir.iterdir() 
-            if d.is_dir() and d.name.isdigit()
-        ]
+        with os.scandir(challenge_dir) as entries:
+            existing_submissions = [
+                int(d.name) for d in entries
+                if d.name.isdigit() and d.is_dir()
+            ]
         
         if not existing_submissions:
             return 1
@@ -76,9 +106,8 @@ class SubmissionService:
             Dictionary with file paths relative to submission folder
         """
         # Create submission files directory
-        submission_dir = SUBMISSIONS_DIR / unique_challenge_id / f"{submission_number:02d}"
-        files_dir = submission_dir / "files"
-        files_dir.mkdir(parents=True, exist_ok=True)
+        files_dir = os.path.join(_challenge_dir(unique_challenge_id), f"{submission_number:02d}", "files")
+        os.makedirs(files_dir, exist_ok=True)
         
         file_info = {
             "canvas": None,
@@ -88,7 +117,7 @@ class SubmissionService:
         try:
             # Copy canvas drawing if present
             if submission_data.get('canvasData'):
-                canvas_path = files_dir / "canvas.png"
+                canvas_path = os.path.join(files_dir, "canvas.png")
                 
                 # Convert base64 canvas to PNG file
                 import base64
@@ -103,54 +132,52 @@ class SubmissionService:
                 logger.info(f"Saved canvas drawing to {canvas_path}")
             
             # Copy uploaded files if they exist
-            # For UUID system, the challenge_id from submission_data is the directory name
-            # For legacy system, we need to extract the original challenge_id
-            
+            # The challengeId from submission_data is the uploads directory name
             challenge_id_for_uploads = submission_data.get('challengeId', unique_challenge_id)
-            # Looking for uploads using challenge_id
+            base_uploads_dir = Path("content/experiment_uploads")
+            uploads_dir = base_uploads_dir / challenge_id_for_uploads
+            uploads_exists = uploads_dir.is_dir()
             
-            # Try the challengeId directly first (should work for both UUID and legacy)
-            uploads_dir = Path("content/experiment_uploads") / challenge_id_for_uploads
-            # Primary upload directory checked
-            
-            # If not found, the upload directory doesn't exist
-            if not uploads_dir.exists():
-                # Upload directory not found
-            
-            # Final upload directory to check
-            
-            if uploads_dir.exists():
+            if uploads_exists:
                 logger.info(f"✅ Uploads directory found: {uploads_dir}")
                 upload_count = 0
-                all_files = list(uploads_dir.iterdir())
-                # Found files in uploads directory
+                debug_enabled = logger.isEnabledFor(logging.DEBUG)
+                pending_copies = []
                 
-                for file_path in all_files:
-                    # Checking file
-                    if file_path.is_file() and file_path.suffix.lower() in ['.jpg', '.jpeg', '.png']:
-                        # Copy with sequential naming
-                        upload_count += 1
-                        dest_filename = f"upload_{upload_count}{file_path.suffix}"
-                        dest_path = files_dir / dest_filename
-                        
-                        shutil.copy2(file_path, dest_path)
-                        file_info["uploads"].append(f"files/{dest_filename}")
-                        
-                        logger.info(f"✅ Copied upload {file_path.name} to {dest_path}")
-                    else:
-                        logger.info(f"❌ Skipped file {file_path.name} (not an image or not a file)")
+                # Stream directory entries instead of materializing them all
+                with os.scandir(uploads_dir) as entries:
+                    for entry in entries:
+                        stem, _, ext = entry.name.rpartition('.')
+                        if stem and ext.lower() in _IMG_EXTS and entry.is_file():
+                            # Copy with sequential naming
+                            upload_count += 1
+                            dest_filename = f"upload_{upload_count}.{ext}"
+                            dest_path = os.path.join(files_dir, dest_filename)
+                            pending_copies.append((entry.name, dest_filename, dest_path,
+                                                   _COPY_POOL.submit(_fast_copy, entry.path, dest_path)))
+                        elif debug_enabled:
+                            logger.debug(f"❌ Skipped file {entry.name} (not an image or not a file)")
+                
+                # Wait for the copies in submission order so upload numbering is preserved
+                for source_name, dest_filename, dest_path, future in pending_copies:
+                    future.result()
+                    file_info["uploads"].append(f"files/{dest_filename}")
+                    
+                    if debug_enabled:
+                        logger.debug(f"✅ Copied upload {source_name} to {dest_path}")
                 
                 logger.info(f"🎯 RESULT: Copied {upload_count} uploaded files to submission")
             else:
                 logger.warning(f"❌ Uploads directory does not exist: {uploads_dir}")
-                # Available upload directories:
-                base_uploads_dir = Path("content/experiment_uploads")
-                if base_uploads_dir.exists():
-                    for subdir in base_uploads_dir.iterdir():
-                        if subdir.is_dir():
-                            logger.info(f"  - {subdir.name}")
-                else:
-                    logger.warning(f"Base uploads directory does not exist: {base_uploads_dir}")
+                # Listing the available upload directories is diagnostic only
+                if logger.isEnabledFor(logging.DEBUG):
+                    if base_uploads_dir.is_dir():
+                        with os.scandir(base_uploads_dir) as entries:
+                            for subdir in entries:
+                                if subdir.is_dir():
+                                    logger.debug(f"  - {subdir.name}")
+                    else:
+                        logger.debug(f"Base uploads directory does not exist: {base_uploads_dir}")
             
         except Exception as e:
             logger.error(f"Error copying files for submission: {e}")
@@ -178,6 +205,9 @@ class SubmissionService:
             Submission ID (UUID)
         """
         try:
+            # Single timestamp for the whole submission (submitted/generated/updated)
+            now_iso = datetime.now().isoformat()
+            
             # Get challenge ID from submission data
             challenge_id = submission_data['challengeId']
             logger.info(f"💾 SAVE: Processing submission for challenge: {challenge_id}")
@@ -194,8 +224,9 @@ class SubmissionService:
             submission_number = SubmissionService.get_next_submission_number(storage_challenge_id)
             
             # Create submission directory
-            submission_dir = SUBMISSIONS_DIR / storage_challenge_id / f"{submission_number:02d}"
-            submission_dir.mkdir(parents=True, exist_ok=True)
+            challenge_dir = _challenge_dir(storage_challenge_id)
+            submission_dir = os.path.join(challenge_dir, f"{submission_number:02d}")
+            os.makedirs(submission_dir, exist_ok=True)
             logger.info(f"💾 SAVE: Created submission directory: {submission_dir}")
             
             # Copy files to submission folder
@@ -218,7 +249,7 @@ class SubmissionService:
                 "challenge_description": challenge_data.get('description', 'No description'),
                 "submission_number": submission_number,
                 "is_final": feedback_data.get('ready_to_submit', False),
-                "submitted_at": datetime.now().isoformat(),
+                "submitted_at": now_iso,
                 "student_profile": {
                     "name": student_profile['student_name'],
                     "age": student_profile['student_age'],
@@ -236,27 +267,29 @@ class SubmissionService:
                     "suggestions": feedback_data.get('suggestions', ''),
                     "overall_assessment": feedback_data.get('overall_assessment', ''),
                     "ready_to_submit": feedback_data.get('ready_to_submit', False),
-                    "generated_at": datetime.now().isoformat()
+                    "generated_at": now_iso
                 }
             }
             
             # Save submission JSON
-            submission_file = submission_dir / "submission.json"
-            with open(submission_file, 'w', encoding='utf-8') as f:
-                json.dump(submission_metadata, f, indent=2, ensure_ascii=False)
+            submission_file = os.path.join(submission_dir, "submission.json")
+            submission_bytes = json.dumps(submission_metadata, indent=2, ensure_ascii=False).encode('utf-8')
+            with open(submission_file, 'wb') as f:
+                f.write(submission_bytes)
             
             # Update latest submission pointer
-            latest_file = SUBMISSIONS_DIR / storage_challenge_id / "latest_submission.json"
+            latest_file = os.path.join(challenge_dir, "latest_submission.json")
             latest_info = {
                 "latest_submission_number": submission_number,
                 "submission_id": submission_id,
                 "challenge_id": challenge_id,
                 "is_final": feedback_data.get('ready_to_submit', False),
-                "updated_at": datetime.now().isoformat()
+                "updated_at": now_iso
             }
             
-            with open(latest_file, 'w', encoding='utf-8') as f:
-                json.dump(latest_info, f, indent=2, ensure_ascii=False)
+            latest_bytes = json.dumps(latest_info, indent=2, ensure_ascii=False).encode('utf-8')
+            with open(latest_file, 'wb') as f:
+                f.write(latest_bytes)
             
             logger.info(
                 f"✅ Saved submission {submission_number:02d} for {storage_challenge_id} "
@@ -3,27 +3,215 @@ Sync Client for Student-App
 Handles discovery and synchronization with tutor-app instances
 """
 
+import asyncio
+import binascii
+import functools
+import hashlib
 import json
 import logging
 import os
 import shutil
-from datetime import datetime
+import threading
+import time
+import zlib
+from collections import Counter
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple, Union
 
-import requests
+import httpx
 from dotenv import load_dotenv
 
+from xapi_logger import xapi_logger
+
+# Fast JSON codec (optional) - falls back to the standard library
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Pre-serialized JSON wrapper (orjson >= 3.9)
+_JSON_FRAGMENT = getattr(orjson, 'Fragment', None) if ORJSON_AVAILABLE else None
+
+# zstd request compression (optional) - falls back to gzip
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
 # Load environment variables
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Shared pool for reading many small content files concurrently during sync
+_READ_POOL = ThreadPoolExecutor(max_workers=min(16, (os.cpu_count() or 1) * 4), thread_name_prefix="sync-read")
+
+def _json_loads(data: bytes):
+    """Decode JSON from raw bytes"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def _json_dumps(obj) -> bytes:
+    """Encode JSON as compact UTF-8 bytes (understands pre-serialized fragments)"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+def _json_dumps_pretty(obj) -> bytes:
+    """Encode JSON as UTF-8 bytes with 2-space indentation"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, indent=2, ensure_ascii=False).encode('utf-8')
+
+# Streamed request bodies are sent in chunks of roughly this many bytes
+_STREAM_CHUNK_SIZE = 1 << 16
+
+def _iter_json_chunks(obj, depth: int) -> Iterator[bytes]:
+    """Encode obj as JSON piece by piece, expanding dicts up to depth levels deep"""
+    if depth <= 0 or not isinstance(obj, dict):
+        yield _json_dumps(obj)
+        return
+    
+    separator = b'{'
+    for key, value in obj.items():
+        yield separator + _json_dumps(key if isinstance(key, str) else str(key)) + b':'
+        yield from _iter_json_chunks(value, depth - 1)
+        separator = b','
+    yield b'}' if separator == b',' else b'{}'
+
+async def _stream_json(obj, depth: int = 5) -> AsyncIterator[bytes]:
+    """Request body generator: the payload is never held as one big bytes object"""
+    buffer = bytearray()
+    for piece in _iter_json_chunks(obj, depth):
+        buffer += piece
+        if len(buffer) >= _STREAM_CHUNK_SIZE:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
+
+async def _compress_stream(chunks: AsyncIterator[bytes], encoding: str) -> AsyncIterator[bytes]:
+    """Compress a streamed request body with the given Content-Encoding (zstd or gzip)"""
+    if encoding == 'zstd':
+        compressor = zstandard.ZstdCompressor(level=3, threads=-1).compressobj()
+    else:
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+def _read_json_fragment(path: Path):
+    """
+    Read a JSON file for the sync payload.
+    
+    The file is still parsed so invalid JSON is rejected, but with orjson the
+    original bytes are returned as a Fragment and spliced verbatim into the
+    payload instead of being re-encoded.
+    """
+    data = path.read_bytes()
+    value = _json_loads(data)
+    if _JSON_FRAGMENT is not None:
+        return _JSON_FRAGMENT(data)
+    return value
+
+def _b64(data: bytes) -> str:
+    """Base64-encode binary file data for the JSON sync payload"""
+    return binascii.b2a_base64(data, newline=False).decode('ascii')
+
+def _read_b64(path: Path) -> str:
+    """Read a binary file and return it base64-encoded"""
+    with open(path, 'rb') as f:
+        return _b64(f.read())
+
+def _read_many(reader: Callable[[Path], Any], paths: List[Path]) -> List[Tuple[Any, Optional[Exception]]]:
+    """
+    Apply reader to every path on the shared read pool.
+    
+    Small-file reads are latency-bound, so overlapping them hides syscall cost.
+    Returns (result, error) pairs in input order; a failing file does not
+    affect the others.
+    """
+    def safe_read(path: Path):
+        try:
+            return reader(path), None
+        except Exception as e:
+            return None, e
+    
+    return list(_READ_POOL.map(safe_read, paths))
+
+# Log lines still timestamp-checked after the first one newer than the cutoff
+_LOG_ORDER_LOOKBACK = 100
+
+def _write_bytes(path: Path, data: bytes) -> None:
+    """Blocking file write, meant to be run via asyncio.to_thread"""
+    with open(path, 'wb', buffering=1 << 16) as f:
+        f.write(data)
+
+def _parse_ts(value: str) -> datetime:
+    """Parse the ISO-8601 timestamps written by the xAPI logger (trailing 'Z' allowed)"""
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+def _iter_files(root: Union[str, Path], suffix: str, recursive: bool = True) -> Iterator[Path]:
+    """Yield regular files under root ending in suffix, using scandir's cached entry types"""
+    stack = [str(root)]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.is_file(follow_symlinks=False):
+                        if entry.name.endswith(suffix):
+                            yield Path(entry.path)
+                    elif recursive and entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+        except OSError:
+            continue
+
+@functools.lru_cache(maxsize=1)
+def _load_student_info(profile_key: Optional[Tuple[int, int]]) -> Tuple[str, str]:
+    """Load (student_id, student_name); profile_key is profile.json's (mtime_ns, size)"""
+    from student_profile import get_current_student_profile
+    
+    profile = get_current_student_profile()
+    
+    if profile is None:
+        # No profile available - use default values
+        return "anonymous_student", "Anonymous Student"
+    
+    # Use actual profile data
+    student_id = profile.get('student_id', 'unknown_id')
+    student_name = profile.get('student_name', 'Unknown Student')
+    
+    return student_id, student_name
+
 class SyncClient:
     def __init__(self):
         self.tutor_url = os.getenv('TUTOR_SERVICE_URL', 'http://localhost:8001')
         self.check_interval = int(os.getenv('SYNC_CHECK_INTERVAL', '30'))
         
+        # A successful discovery probe is trusted for this many seconds
+        self._discovery_cache_ttl = float(os.getenv('SYNC_DISCOVERY_CACHE_TTL', '10'))
+        self._last_ok_ts = 0.0
+        
+        # Request encodings the tutor advertised in its last discovery response
+        self._tutor_encodings: List[str] = []
+        
+        # Shared async HTTP client so sync I/O never blocks the event loop and
+        # every sync cycle reuses keep-alive connections
+        self.http = httpx.AsyncClient(
+            base_url=self.tutor_url,
+            timeout=30.0,
+            limits=httpx.Limits(max_keepalive_connections=8, max_connections=16),
+            transport=httpx.AsyncHTTPTransport(retries=2)
+        )
+        
         # SyncClient is now dynamic - no cached student data
         logger.info("🔍 SyncClient initialized (dynamic profile loading)")
         
@@ -37,48 +225,128 @@ class SyncClient:
         # Ensure directories exist
         for dir_path in [self.inbox_dir, self.processed_dir, self.generated_dir, self.logs_dir]:
             dir_path.mkdir(parents=True, exist_ok=True)
-    
-    def _get_current_student_info(self) -> tuple[str, str]:
-        """Get current student ID and name from profile"""
-        from student_profile import get_current_student_profile
         
-        profile = get_current_student_profile()
+        # Last read position in student.log, so delta syncs only read new bytes
+        self._log_offset_file = self.logs_dir / ".sync_offset.json"
+        self._log_offset = self._load_log_offset()
+        
+        # Encoded JSON files from the previous full sync, keyed by path and
+        # validated by (st_mtime_ns, st_size) so unchanged files are not re-read.
+        # Binary media (submission files, discovery images) is deliberately not
+        # cached: keeping it base64-encoded would pin ~1.33x its size in RAM
+        self._content_cache: Dict[Path, Tuple[int, int, Any]] = {}
+        self._next_content_cache: Dict[Path, Tuple[int, int, Any]] = {}
         
-        if profile is None:
-            # No profile available - use default values
-            return "anonymous_student", "Anonymous Student"
+        # Small, rarely changing JSON files (progress, challenges registry): path -> (mtime_ns, value)
+        self._progress_cache: Dict[Path, Tuple[int, Any]] = {}
         
-        # Use actual profile data
-        student_id = profile.get('student_id', 'unknown_id')
-        student_name = profile.get('student_name', 'Unknown Student')
+        # Fingerprint of the content tree at the last successful full sync
+        self._last_content_fingerprint: Optional[str] = None
         
-        return student_id, student_name
+        # Payload preparation runs off the event loop; one at a time, since it
+        # advances the log offset and swaps the content cache
+        self._prepare_lock = threading.Lock()
     
-    def discover_tutor_service(self) -> bool:
+    async def aclose(self):
+        """Release pooled HTTP connections"""
+        await self.http.aclose()
+    
+    def _get_current_student_info(self) -> tuple[str, str]:
+        """Get current student ID and name from profile (cached until profile.json changes)"""
+        try:
+            st = os.stat("profile.json")
+            profile_key = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            profile_key = None
+        return _load_student_info(profile_key)
+    
+    def _invalidate_discovery_cache(self):
+        """Force the next discover_tutor_service call to probe the tutor again"""
+        self._last_ok_ts = 0.0
+    
+    async def discover_tutor_service(self) -> bool:
         """Check if tutor service is available and accepting connections"""
+        if time.monotonic() - self._last_ok_ts < self._discovery_cache_ttl:
+            return True
+        
         try:
             logger.info(f"Checking tutor service at: {self.tutor_url}/api/sync/discover")
-            response = requests.get(f"{self.tutor_url}/api/sync/discover", timeout=5)
+            response = await self.http.get("/api/sync/discover", timeout=5)
             logger.info(f"Tutor service response: {response.status_code}")
             
             if response.status_code == 200:
                 data = response.json()
                 available = data.get('available', False)
+                self._tutor_encodings = data.get('content_encodings', [])
                 logger.info(f"Tutor service available: {available}, data: {data}")
+                self._last_ok_ts = time.monotonic() if available else 0.0
                 return available
             else:
                 logger.warning(f"Tutor service returned status {response.status_code}: {response.text}")
                 return False
-        except requests.exceptions.ConnectionError as e:
+        except httpx.ConnectError as e:
             logger.warning(f"Connection error to tutor service: {e}")
             return False
-        except requests.exceptions.Timeout as e:
+        except httpx.TimeoutException as e:
             logger.warning(f"Timeout connecting to tutor service: {e}")
             return False
         except Exception as e:
             logger.error(f"Error checking tutor service: {e}")
             return False
     
+    def _upload_encoding(self) -> Optional[str]:
+        """Pick the best request Content-Encoding the tutor accepts (None = uncompressed)"""
+        if ZSTD_AVAILABLE and 'zstd' in self._tutor_encodings:
+            return 'zstd'
+        if 'gzip' in self._tutor_encodings:
+            return 'gzip'
+        return None
+    
+    def _load_log_offset(self) -> Dict:
+        """Load the persisted student.log read position ({path, inode, offset, read_at})"""
+        try:
+            with open(self._log_offset_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def _save_log_offset(self, log_file: Path, inode: int, offset: int, read_at: datetime):
+        """Persist the student.log position reached by the last read"""
+        self._log_offset = {
+            'path': str(log_file),
+            'inode': inode,
+            'offset': offset,
+            'read_at': read_at.isoformat()
+        }
+        try:
+            with open(self._log_offset_file, 'w', encoding='utf-8') as f:
+                json.dump(self._log_offset, f)
+        except OSError as e:
+            logger.warning(f"Could not persist log sync offset: {e}")
+    
+    def _resume_offset(self, log_file: Path, st: os.stat_result, since_ts: float) -> int:
+        """
+        Byte offset from which lines newer than since_ts (epoch seconds) can start.
+        
+        Every line before the stored offset was written before the stored read_at,
+        so when since_ts is not earlier than read_at those lines would all be
+        filtered out anyway. Falls back to 0 if the file was rotated or truncated.
+        """
+        state = self._log_offset
+        if (
+            state.get('path') != str(log_file)
+            or state.get('inode') != st.st_ino
+            or st.st_size < state.get('offset', 0)
+        ):
+            return 0
+        try:
+            if since_ts >= _parse_ts(state['read_at']).timestamp():
+                return state['offset']
+        except (KeyError, TypeError, ValueError):
+            # Missing or corrupt state - rescan from the beginning
+            pass
+        return 0
+    
     def get_student_logs(self, since_timestamp: Optional[str] = None) -> str:
         """Collect ONLY xAPI student activity logs (exclude technical logs like model_interactions.log)"""
         logs_content = ""
@@ -92,8 +360,11 @@ class SyncClient:
                     logs_content = self._get_logs_since_timestamp(xapi_log_file, since_timestamp)
                 else:
                     # Read all logs
-                    with open(xapi_log_file, 'r', encoding='utf-8') as f:
-                        logs_content = f.read()
+                    with open(xapi_log_file, 'rb') as f:
+                        data = f.read()
+                        st = os.fstat(f.fileno())
+                    self._save_log_offset(xapi_log_file, st.st_ino, len(data), datetime.now(timezone.utc))
+                    logs_content = data.decode('utf-8')
         
             # Only xAPI logs (student.log) are sent to tutor for pedagogical analysis
         
@@ -107,27 +378,54 @@ class SyncClient:
         filtered_logs = ""
         
         try:
-            from dateutil.parser import parse as parse_date
-            since_dt = parse_date(since_timestamp)
+            # Compare as epoch floats: cheap, and works for naive and aware values alike
+            since_ts = _parse_ts(since_timestamp).timestamp()
+            parts = []
             
-            with open(log_file, 'r', encoding='utf-8') as f:
+            with open(log_file, 'rb', buffering=1 << 16) as f:
+                st = os.fstat(f.fileno())
+                # Skip the part of the log already known to be older than since_ts
+                f.seek(self._resume_offset(log_file, st, since_ts))
+                
+                # The log is append-only and roughly time-ordered: once a newer entry
+                # shows up, keep checking a short window for stragglers, then take
+                # every remaining line without parsing it
+                lookback_left = None
+                past_cutoff = False
+                
                 for line in f:
-                    line = line.strip()
+                    if line.endswith(b'\n'):
+                        line = line[:-1]
                     if not line:
                         continue
                     
+                    if past_cutoff:
+                        parts.append(line)
+                        continue
+                    if lookback_left is not None:
+                        lookback_left -= 1
+                        past_cutoff = lookback_left <= 0
+                    
                     try:
                         # Parse JSON line to get timestamp
-                        log_entry = json.loads(line)
+                        log_entry = _json_loads(line)
                         log_timestamp_str = log_entry.get('timestamp')
                         if log_timestamp_str:
-                            log_dt = parse_date(log_timestamp_str)
-                            if log_dt > since_dt:
-                                filtered_logs += line + '\n'
-                    except (json.JSONDecodeError, ValueError) as e:
+                            if _parse_ts(log_timestamp_str).timestamp() > since_ts:
+                                parts.append(line)
+                                if lookback_left is None:
+                                    lookback_left = _LOG_ORDER_LOOKBACK
+                    except (json.JSONDecodeError, UnicodeDecodeError, ValueError) as e:
                         # If we can't parse the line as JSON or timestamp, include it anyway
                         logger.debug(f"Could not parse log line timestamp: {e}")
-                        filtered_logs += line + '\n'
+                        parts.append(line)
+                
+                end_offset = f.tell()
+            
+            self._save_log_offset(log_file, st.st_ino, end_offset, datetime.now(timezone.utc))
+            if parts:
+                parts.append(b'')
+            filtered_logs = b'\n'.join(parts).decode('utf-8')
         
         except Exception as e:
             logger.warning(f"Error filtering logs by timestamp, returning all logs: {e}")
@@ -137,8 +435,35 @@ class SyncClient:
         
         return filtered_logs
     
+    def _read_cached(self, reader: Callable[[Path], Any], path: Path) -> Any:
+        """Return reader(path), reusing the previous result if the file is unchanged"""
+        st = path.stat()
+        cached = self._content_cache.get(path)
+        if cached is not None and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+            value = cached[2]
+        else:
+            value = reader(path)
+        self._next_content_cache[path] = (st.st_mtime_ns, st.st_size, value)
+        return value
+    
+    def _read_progress_cached(self, reader: Callable[[Path], Any], path: Path) -> Any:
+        """Return reader(path), reusing the cached value while the file's mtime is unchanged"""
+        st = path.stat()
+        cached = self._progress_cache.get(path)
+        if cached is not None and cached[0] == st.st_mtime_ns:
+            return cached[1]
+        value = reader(path)
+        self._progress_cache[path] = (st.st_mtime_ns, value)
+        return value
+    
+    def _read_many_cached(self, reader: Callable[[Path], Any], paths: List[Path]) -> List[Tuple[Any, Optional[Exception]]]:
+        """_read_many through the content cache"""
+        return _read_many(lambda path: self._read_cached(reader, path), paths)
+    
     def collect_content_data(self) -> Dict:
         """Collect all generated content, submissions, and discovery data"""
+        # Only files seen during this collection stay cached
+        self._next_content_cache = {}
         content_data = {
             'generated': {},
             'submissions': {},
@@ -175,42 +500,73 @@ class SyncClient:
             ]
             
             for progress_file in progress_files:
-                if progress_file.exists():
-                    try:
-                        with open(progress_file, 'r', encoding='utf-8') as f:
-                            progress_data = json.load(f)
-                        content_data['progress'][progress_file.stem] = progress_data
-                    except Exception as e:
-                        logger.warning(f"Could not read progress file {progress_file}: {e}")
+                try:
+                    progress_data = self._read_progress_cached(_read_json_fragment, progress_file)
+                    content_data['progress'][progress_file.stem] = progress_data
+                except FileNotFoundError:
+                    continue
+                except Exception as e:
+                    logger.warning(f"Could not read progress file {progress_file}: {e}")
             
             # Collect current content list
             content_data['current_content'] = self._get_current_content_list()
+            
+            self._content_cache = self._next_content_cache
         
         except Exception as e:
             logger.error(f"Error collecting content data: {e}")
         
         return content_data
     
+    def _content_fingerprint(self, student_id: str) -> str:
+        """Cheap digest of the content tree: (relative path, mtime_ns, size) of every file"""
+        digest = hashlib.blake2b(digest_size=16)
+        # Scoped to who is syncing and where: a profile switch or another tutor never
+        # reuses the previous fingerprint
+        digest.update(f"{student_id}\0{self.tutor_url}\n".encode('utf-8'))
+        root = str(self.content_dir)
+        
+        for dirpath, dirnames, filenames in os.walk(root):
+            if dirpath == root and self.inbox_dir.name in dirnames:
+                # Inbox files are rewritten by every fetch and never uploaded
+                dirnames.remove(self.inbox_dir.name)
+            # Walk in a stable order so an unchanged tree always hashes the same
+            dirnames.sort()
+            for name in sorted(filenames):
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                digest.update(f"{os.path.relpath(path, root)}\0{st.st_mtime_ns}\0{st.st_size}\n".encode('utf-8', 'surrogateescape'))
+        
+        return digest.hexdigest()
+    
     def _collect_generated_content(self) -> Dict:
         """Collect all generated content (questions, challenges, stories, textbooks)"""
         generated_content = {}
         
         try:
-            for content_type_dir in self.generated_dir.iterdir():
-                if content_type_dir.is_dir():
-                    content_type = content_type_dir.name
-                    generated_content[content_type] = {}
-                    
-                    # Handle nested structure (e.g., learn/textbooks, learn/stories)
-                    for item in content_type_dir.rglob("*.json"):
-                        relative_path = item.relative_to(content_type_dir)
-                        key = str(relative_path).replace('.json', '').replace('/', '_')
-                        
-                        try:
-                            with open(item, 'r', encoding='utf-8') as f:
-                                generated_content[content_type][key] = json.load(f)
-                        except Exception as e:
-                            logger.warning(f"Could not read generated content {item}: {e}")
+            pending = []
+            with os.scandir(self.generated_dir) as type_entries:
+                content_type_dirs = [Path(entry.path) for entry in type_entries if entry.is_dir()]
+            
+            for content_type_dir in content_type_dirs:
+                content_type = content_type_dir.name
+                generated_content[content_type] = {}
+                
+                # Handle nested structure (e.g., learn/textbooks, learn/stories)
+                for item in _iter_files(content_type_dir, '.json'):
+                    relative_path = item.relative_to(content_type_dir)
+                    key = str(relative_path).replace('.json', '').replace('/', '_')
+                    pending.append((content_type, key, item))
+            
+            items = [item for _, _, item in pending]
+            for (content_type, key, item), (value, error) in zip(pending, self._read_many_cached(_read_json_fragment, items)):
+                if error is None:
+                    generated_content[content_type][key] = value
+                else:
+                    logger.warning(f"Could not read generated content {item}: {error}")
         
         except Exception as e:
             logger.error(f"Error collecting generated content: {e}")
@@ -225,50 +581,51 @@ class SyncClient:
         }
         
         try:
-            # Collect submission metadata (JSON files)
-            for submission_file in submissions_dir.glob("*.json"):
-                try:
-                    with open(submission_file, 'r', encoding='utf-8') as f:
-                        submission_data = json.load(f)
+            # One pass over the directory: JSON metadata files and submission folders
+            submission_files = []
+            pending = []
+            with os.scandir(submissions_dir) as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        if entry.name.endswith('.json'):
+                            submission_files.append(Path(entry.path))
+                        continue
+                    if not entry.is_dir():
+                        continue
+                    
+                    # Collect submission files from numbered folders (01, 02, etc.) with files/
+                    submission_id = entry.name
+                    with os.scandir(entry.path) as version_entries:
+                        version_dirs = [
+                            (version_entry.name, os.path.join(version_entry.path, "files"))
+                            for version_entry in version_entries
+                            if version_entry.name.isdigit() and version_entry.is_dir()
+                        ]
+                    for version_num, files_dir in version_dirs:
+                        for file_path in _iter_files(files_dir, '', recursive=False):
+                            pending.append((submission_id, version_num, file_path))
+            
+            for submission_file, (submission_data, error) in zip(
+                submission_files, self._read_many_cached(_read_json_fragment, submission_files)
+            ):
+                if error is None:
                     submissions_data['metadata'].append(submission_data)
-                except Exception as e:
-                    logger.warning(f"Could not read submission {submission_file}: {e}")
+                else:
+                    logger.warning(f"Could not read submission {submission_file}: {error}")
             
-            # Collect submission files (directories with files/)
-            for submission_dir in submissions_dir.iterdir():
-                if submission_dir.is_dir():
-                    submission_id = submission_dir.name
-                    submission_files = {}
-                    
-                    # Look for numbered submission folders (01, 02, etc.)
-                    for version_dir in submission_dir.iterdir():
-                        if version_dir.is_dir() and version_dir.name.isdigit():
-                            version_num = version_dir.name
-                            files_dir = version_dir / "files"
-                            
-                            if files_dir.exists():
-                                version_files = {}
-                                for file_path in files_dir.iterdir():
-                                    if file_path.is_file():
-                                        try:
-                                            with open(file_path, 'rb') as f:
-                                                import base64
-                                                file_data = base64.b64encode(f.read()).decode('utf-8')
-                                                version_files[file_path.name] = {
-                                                    'filename': file_path.name,
-                                                    'data': file_data,
-                                                    'format': file_path.suffix.lower()
-                                                }
-                                        except Exception as e:
-                                            logger.warning(f"Could not read submission file {file_path}: {e}")
-                                
-                                if version_files:
-                                    if submission_id not in submission_files:
-                                        submission_files[submission_id] = {}
-                                    submission_files[submission_id][version_num] = version_files
-                    
-                    if submission_files:
-                        submissions_data['files'].update(submission_files)
+            file_paths = [file_path for _, _, file_path in pending]
+            for (submission_id, version_num, file_path), (file_data, error) in zip(
+                pending, _read_many(_read_b64, file_paths)  # binary: not cached, see _content_cache
+            ):
+                if error is None:
+                    version_files = submissions_data['files'].setdefault(submission_id, {}).setdefault(version_num, {})
+                    version_files[file_path.name] = {
+                        'filename': file_path.name,
+                        'data': file_data,
+                        'format': file_path.suffix.lower()
+                    }
+                else:
+                    logger.warning(f"Could not read submission file {file_path}: {error}")
         
         except Exception as e:
             logger.error(f"Error collecting submissions from {submissions_dir}: {e}")
@@ -284,31 +641,31 @@ class SyncClient:
         
         try:
             # Collect JSON session data
-            for discovery_file in discovery_dir.glob("*.json"):
-                session_id = discovery_file.stem
-                try:
-                    with open(discovery_file, 'r', encoding='utf-8') as f:
-                        discovery_data['sessions'][session_id] = json.load(f)
-                except Exception as e:
-                    logger.warning(f"Could not read discovery data {discovery_file}: {e}")
+            discovery_files = list(_iter_files(discovery_dir, '.json', recursive=False))
+            for discovery_file, (session_data, error) in zip(
+                discovery_files, self._read_many_cached(_read_json_fragment, discovery_files)
+            ):
+                if error is None:
+                    discovery_data['sessions'][discovery_file.stem] = session_data
+                else:
+                    logger.warning(f"Could not read discovery data {discovery_file}: {error}")
             
             # Collect images
             images_dir = discovery_dir / "images"
             if images_dir.exists():
-                for image_file in images_dir.iterdir():
-                    if image_file.is_file() and image_file.suffix.lower() in ['.jpg', '.jpeg', '.png', '.gif']:
-                        image_id = image_file.stem
-                        try:
-                            with open(image_file, 'rb') as f:
-                                import base64
-                                image_data = base64.b64encode(f.read()).decode('utf-8')
-                                discovery_data['images'][image_id] = {
-                                    'filename': image_file.name,
-                                    'data': image_data,
-                                    'format': image_file.suffix.lower()
-                                }
-                        except Exception as e:
-                            logger.warning(f"Could not read discovery image {image_file}: {e}")
+                image_files = [
+                    image_file for image_file in _iter_files(images_dir, '', recursive=False)
+                    if image_file.suffix.lower() in ['.jpg', '.jpeg', '.png', '.gif']
+                ]
+                for image_file, (image_data, error) in zip(image_files, _read_many(_read_b64, image_files)):
+                    if error is None:
+                        discovery_data['images'][image_file.stem] = {
+                            'filename': image_file.name,
+                            'data': image_data,
+                            'format': image_file.suffix.lower()
+                        }
+                    else:
+                        logger.warning(f"Could not read discovery image {image_file}: {error}")
         
         except Exception as e:
             logger.error(f"Error collecting discovery data: {e}")
@@ -322,7 +679,7 @@ class SyncClient:
         try:
             # Files in processed directory
             if self.processed_dir.exists():
-                for content_file in self.processed_dir.glob("*.txt"):
+                for content_file in _iter_files(self.processed_dir, '.txt', recursive=False):
                     current_content.append(content_file.name)
         
         except Exception as e:
@@ -330,22 +687,30 @@ class SyncClient:
         
         return current_content
     
-    async def sync_to_tutor(self, last_sync: Optional[str] = None) -> Dict:
-        """Send student data to tutor service (with optional delta sync)"""
-        try:
-            # Get current student info dynamically
-            student_id_to_use, student_name_to_use = self._get_current_student_info()
-            logger.info(f"🔄 Sync using current profile: {student_name_to_use} ({student_id_to_use})")
-            
+    def _prepare_payload(self, last_sync: Optional[str], student_id: str) -> Tuple[str, Dict, str, Optional[str]]:
+        """
+        Read everything a sync sends (blocking - run it off the event loop)
+        
+        Returns:
+            (logs, content_data, sync_type, content fingerprint or None for delta syncs)
+        """
+        with self._prepare_lock:
             # Collect data with optional timestamp filtering
             logs = self.get_student_logs(since_timestamp=last_sync)
             
-            # For content_data, only collect if this is initial sync or forced
-            content_data = {}
+            # A full sync whose content tree hasn't changed since the last successful
+            # full sync only needs to send logs and the current content list
+            content_fingerprint = None
+            content_unchanged = False
             if not last_sync:
+                content_fingerprint = self._content_fingerprint(student_id)
+                content_unchanged = content_fingerprint == self._last_content_fingerprint
+            
+            # For content_data, only collect if this is initial sync or forced
+            if not last_sync and not content_unchanged:
                 # Full sync - include all content data
                 content_data = self.collect_content_data()
-                logger.info("Performing full sync with all content data")
+                logger.debug("Performing full sync with all content data")
             else:
                 # Delta sync - only include logs, minimal content data
                 content_data = {
@@ -355,7 +720,31 @@ class SyncClient:
                     'progress': {},
                     'current_content': self._get_current_content_list()
                 }
-                logger.info(f"Performing delta sync since {last_sync}")
+                if last_sync:
+                    logger.debug("Performing delta sync since %s", last_sync)
+                else:
+                    logger.debug("Content unchanged since last full sync - sending logs only")
+        
+        sync_type = 'delta' if last_sync or content_unchanged else 'full'
+        return logs, content_data, sync_type, content_fingerprint
+    
+    async def sync_to_tutor(self, last_sync: Optional[str] = None) -> Dict:
+        """Send student data to tutor service (with optional delta sync)"""
+        try:
+            # Get current student info dynamically
+            student_id_to_use, student_name_to_use = self._get_current_student_info()
+            debug_enabled = logger.isEnabledFor(logging.DEBUG)
+            if debug_enabled:
+                logger.debug("🔄 Sync using current profile: %s (%s)", student_name_to_use, student_id_to_use)
+            
+            # Statements still buffered by the xAPI writer thread would otherwise miss this sync
+            if not await asyncio.to_thread(xapi_logger.flush, 5.0):
+                logger.warning("xAPI log flush timed out - recent activity may arrive with the next sync")
+            
+            # Disk phase (log read, content tree walk, file reads) on a worker thread
+            logs, content_data, sync_type, content_fingerprint = await asyncio.to_thread(
+                self._prepare_payload, last_sync, student_id_to_use
+            )
             
             # Prepare sync request (using reloaded profile data)
             sync_data = {
@@ -367,30 +756,60 @@ class SyncClient:
                 },
                 'logs': logs,
                 'content_data': content_data,
-                'sync_type': 'delta' if last_sync else 'full'
+                'sync_type': sync_type
             }
             
             # Send to tutor
-            response = requests.post(
-                f"{self.tutor_url}/api/sync/from-student",
-                json=sync_data,
-                timeout=30
+            # Stream the encoded payload (chunked transfer) instead of building it
+            # whole; pre-serialized content fragments are spliced in as-is
+            body = _stream_json(sync_data)
+            headers = {'Content-Type': 'application/json'}
+            if content_fingerprint is not None:
+                if sync_type == 'delta':
+                    # Content left out: only valid while the tutor still holds this version
+                    headers['If-Match'] = f'"{content_fingerprint}"'
+                else:
+                    headers['X-Content-Fingerprint'] = content_fingerprint
+            
+            # JSON and base64 compress well, so compress when the tutor supports it
+            encoding = self._upload_encoding()
+            if encoding:
+                body = _compress_stream(body, encoding)
+                headers['Content-Encoding'] = encoding
+            
+            response = await self.http.post(
+                "/api/sync/from-student",
+                content=body,
+                headers=headers
             )
             
+            if response.status_code == 412:
+                # The tutor lost the content (student deleted, tutor restarted) - send it all again
+                logger.info("Tutor no longer holds the synced content - retrying as a full sync")
+                self._last_content_fingerprint = None
+                return await self.sync_to_tutor(last_sync)
+            
             if response.status_code == 200:
-                sync_response = response.json()
-                logger.info(f"Successfully synced to tutor: {sync_response.get('message', '')}")
+                sync_response = _json_loads(response.content)
+                if content_fingerprint is not None:
+                    self._last_content_fingerprint = content_fingerprint
                 
                 # Log the response details for debugging
                 assigned_content = sync_response.get('assigned_content', [])
                 removed_content = sync_response.get('removed_content', [])
                 
-                logger.info(f"📥 Sync response received:")
-                logger.info(f"  📚 Assigned content: {assigned_content}")
-                logger.info(f"  🗑️ Removed content: {removed_content}")
+                if debug_enabled:
+                    logger.debug("📥 Sync response received: %s", sync_response.get('message', ''))
+                    logger.debug("  📚 Assigned content: %s", assigned_content)
+                    logger.debug("  🗑️ Removed content: %s", removed_content)
                 
                 # Process assigned content changes
-                await self._process_content_changes(sync_response)
+                await self._process_content_changes(sync_response, (student_id_to_use, student_name_to_use))
+                
+                logger.info(
+                    "🔄 Synced %s (%s sync): %d assigned, %d removed",
+                    student_id_to_use, sync_type, len(assigned_content), len(removed_content)
+                )
                 
                 return {
                     'success': True,
@@ -401,89 +820,125 @@ class SyncClient:
             else:
                 error_msg = f"Sync failed: {response.status_code} {response.text}"
                 logger.error(error_msg)
+                self._invalidate_discovery_cache()
                 return {'success': False, 'message': error_msg}
         
+        except httpx.HTTPError as e:
+            # Tutor unreachable or misbehaving - re-probe on the next discovery check
+            self._invalidate_discovery_cache()
+            error_msg = f"Sync error: {str(e)}"
+            logger.error(error_msg)
+            return {'success': False, 'message': error_msg}
         except Exception as e:
             error_msg = f"Sync error: {str(e)}"
             logger.error(error_msg)
             return {'success': False, 'message': error_msg}
     
-    async def _process_content_changes(self, sync_response: Dict):
+    async def _process_content_changes(self, sync_response: Dict, student_info: Tuple[str, str]):
         """Process content changes from tutor (new assignments, removals)"""
         try:
             assigned_content = sync_response.get('assigned_content', [])
             removed_content = sync_response.get('removed_content', [])
             
-            logger.info(f"🔄 Processing content changes from tutor:")
-            logger.info(f"  📚 New assignments: {assigned_content}")
-            logger.info(f"  🗑️ Content to remove: {removed_content}")
-            
             # Get new content from tutor
             if assigned_content:
-                logger.info(f"⬇️ Fetching {len(assigned_content)} new content files...")
-                await self._fetch_assigned_content(assigned_content)
-            else:
-                logger.info("📝 No new content to fetch")
+                logger.debug("⬇️ Fetching %d new content files...", len(assigned_content))
+                await self._fetch_assigned_content(assigned_content, student_info)
             
             # Remove content that's no longer assigned
             if removed_content:
-                logger.info(f"🗑️ Removing {len(removed_content)} unassigned content files...")
+                logger.debug("🗑️ Removing %d unassigned content files...", len(removed_content))
                 await self._remove_unassigned_content(removed_content)
-            else:
-                logger.info("✅ No content to remove")
         
         except Exception as e:
             logger.error(f"❌ Error processing content changes: {e}")
             import traceback
             logger.error(f"🔍 Full traceback:\n{traceback.format_exc()}")
     
-    async def _fetch_assigned_content(self, assigned_files: List[str]):
-        """Fetch newly assigned content from tutor"""
+    async def _fetch_assigned_content(self, assigned_files: List[str], student_info: Tuple[str, str]):
+        """Fetch newly assigned content from tutor (manifest first, then only the new files)"""
         try:
-            student_id, _ = self._get_current_student_info()
-            response = requests.get(f"{self.tutor_url}/api/sync/content/{student_id}")
+            student_id, _ = student_info
+            response = await self.http.get(f"/api/sync/content/{student_id}", params={'manifest': 'true'})
             
             if response.status_code == 200:
-                content_data = response.json()
-                content_files = content_data.get('content', {}).get('content_data', {})
+                content = _json_loads(response.content).get('content', {})
                 
-                for filename, content in content_files.items():
-                    # Check if file is new (not in processed)
-                    processed_file = self.processed_dir / filename
-                    inbox_file = self.inbox_dir / filename
-                    
-                    if not processed_file.exists():
-                        # Save to inbox for new content
-                        with open(inbox_file, 'w', encoding='utf-8') as f:
-                            f.write(content)
-                        logger.info(f"Added new content to inbox: {filename}")
+                if 'files' in content:
+                    # Download only files not processed yet, one request per file
+                    wanted = [entry for entry in content['files']
+                              if not (self.processed_dir / entry['name']).exists()]
+                    downloads = await asyncio.gather(
+                        *(self._download_content_file(entry['url']) for entry in wanted),
+                        return_exceptions=True
+                    )
+                    new_files = []
+                    for entry, result in zip(wanted, downloads):
+                        if isinstance(result, BaseException):
+                            logger.error(f"Error downloading content {entry['name']}: {result}")
+                        else:
+                            new_files.append((entry['name'], result))
+                else:
+                    # Older tutor without manifest support: contents come inline
+                    new_files = [
+                        (filename, text.encode('utf-8'))
+                        for filename, text in content.get('content_data', {}).items()
+                        if not (self.processed_dir / filename).exists()
+                    ]
+                
+                # Save new content to the inbox off the event loop, all files at once
+                results = await asyncio.gather(
+                    *(asyncio.to_thread(_write_bytes, self.inbox_dir / filename, data)
+                      for filename, data in new_files),
+                    return_exceptions=True
+                )
+                for (filename, _), result in zip(new_files, results):
+                    if isinstance(result, BaseException):
+                        logger.error(f"Error saving content {filename} to inbox: {result}")
                     else:
-                        logger.debug(f"Content already exists: {filename}")
+                        logger.debug("Added new content to inbox: %s", filename)
         
         except Exception as e:
             logger.error(f"Error fetching assigned content: {e}")
     
+    async def _download_content_file(self, url: str) -> bytes:
+        """Download one content file listed in the tutor's manifest"""
+        response = await self.http.get(url)
+        response.raise_for_status()
+        return response.content
+    
+    @staticmethod
+    async def _remove_path(path: Path) -> bool:
+        """Remove a file or directory tree; returns False if it was already gone"""
+        try:
+            path.unlink()
+            return True
+        except FileNotFoundError:
+            return False
+        except (IsADirectoryError, PermissionError):
+            # unlink() refuses directories (EISDIR on Linux, EPERM on macOS)
+            if not path.is_dir():
+                raise
+        # Deleting a whole tree can take a while, keep it off the event loop
+        await asyncio.to_thread(shutil.rmtree, path)
+        return True
+    
     async def _remove_unassigned_content(self, removed_files: List[str]):
         """Remove content that's no longer assigned"""
         try:
-            logger.info(f"🗑️ Starting removal of unassigned content: {removed_files}")
+            debug_enabled = logger.isEnabledFor(logging.DEBUG)
+            if debug_enabled:
+                logger.debug("🗑️ Starting removal of unassigned content: %s", removed_files)
             
+            # Collect every path to remove up front so they can be deleted concurrently
+            paths_to_remove = []
+            base_names = []
             for filename in removed_files:
-                logger.info(f"🎯 Processing removal of: {filename}")
                 base_name = filename.replace('.txt', '')
-                logger.info(f"📝 Base name: {base_name}")
-                
-                # Remove from processed
-                processed_file = self.processed_dir / filename
-                logger.info(f"🔍 Checking processed file: {processed_file}")
-                if processed_file.exists():
-                    processed_file.unlink()
-                    logger.info(f"✅ Removed processed file: {processed_file}")
-                else:
-                    logger.warning(f"⚠️ Processed file not found: {processed_file}")
-                
-                # Remove associated generated content
-                content_dirs_to_remove = [
+                base_names.append(base_name)
+                paths_to_remove.extend((
+                    # Processed source file
+                    self.processed_dir / filename,
                     # Practice content (whole directory)
                     self.generated_dir / "practice" / base_name,
                     # Learn content (individual files)
@@ -491,30 +946,29 @@ class SyncClient:
                     self.generated_dir / "learn" / "stories" / f"{base_name}.json",
                     # Experiment content (whole directory)
                     self.generated_dir / "experiment" / base_name
-                ]
-                
-                logger.info(f"🗂️ Checking {len(content_dirs_to_remove)} generated content paths:")
-                
-                for content_path in content_dirs_to_remove:
-                    logger.info(f"🔍 Checking path: {content_path}")
-                    if content_path.exists():
-                        try:
-                            if content_path.is_dir():
-                                shutil.rmtree(content_path)
-                                logger.info(f"✅ Removed directory: {content_path}")
-                            else:
-                                content_path.unlink()
-                                logger.info(f"✅ Removed file: {content_path}")
-                        except Exception as path_error:
-                            logger.error(f"❌ Failed to remove {content_path}: {path_error}")
-                    else:
-                        logger.info(f"📝 Path doesn't exist (OK): {content_path}")
-                
-                # Remove experiment challenges associated with this content
-                logger.info(f"🎯 Removing experiment challenges for: {base_name}")
+                ))
+            
+            results = await asyncio.gather(
+                *(self._remove_path(path) for path in paths_to_remove),
+                return_exceptions=True
+            )
+            
+            removed_count = 0
+            for content_path, result in zip(paths_to_remove, results):
+                if isinstance(result, BaseException):
+                    logger.error(f"❌ Failed to remove {content_path}: {result}")
+                elif result:
+                    removed_count += 1
+                    if debug_enabled:
+                        logger.debug("✅ Removed: %s", content_path)
+                elif debug_enabled:
+                    logger.debug("📝 Path doesn't exist (OK): %s", content_path)
+            
+            # Registry updates are read-modify-write, so they run one content at a time
+            for base_name in base_names:
                 await self._remove_experiment_challenges_for_content(base_name)
-                
-                logger.info(f"✅ Completed removal processing for: {filename}")
+            
+            logger.debug("✅ Removed %d paths for %d unassigned content files", removed_count, len(removed_files))
         
         except Exception as e:
             logger.error(f"❌ Error removing unassigned content: {e}")
@@ -525,36 +979,48 @@ class SyncClient:
         """Remove experiment challenges that were generated from the specified content"""
         try:
             challenges_registry_file = self.generated_dir / "experiment" / "challenges_registry.json"
-            if not challenges_registry_file.exists():
-                logger.info(f"No challenges registry found, skipping challenge cleanup for {content_name}")
-                return
             
             # Load current registry
-            with open(challenges_registry_file, 'r', encoding='utf-8') as f:
-                registry_data = json.load(f)
+            try:
+                registry_data = self._read_progress_cached(lambda path: _json_loads(path.read_bytes()), challenges_registry_file)
+            except FileNotFoundError:
+                logger.debug("No challenges registry found, skipping challenge cleanup for %s", content_name)
+                return
             
+            # The cached registry is edited in place below - drop it until the new file is written
+            cached_registry = self._progress_cache.pop(challenges_registry_file, None)
+            
+            challenges = registry_data.get("challenges", {})
             challenges_to_remove = []
-            updated_challenges = {}
+            updated_count = 0
+            # Source usage counts of the challenges that stay, built in the same pass
+            all_sources = Counter()
+            debug_enabled = logger.isEnabledFor(logging.DEBUG)
             
-            # Check each challenge to see if it should be removed or updated
-            for challenge_uuid, challenge_info in registry_data.get("challenges", {}).items():
+            # Check each challenge to see if it should be removed or updated (in place)
+            for challenge_uuid in list(challenges):
+                challenge_info = challenges[challenge_uuid]
                 source_contents = challenge_info.get("source_contents", [])
                 
                 if content_name in source_contents:
                     if len(source_contents) == 1:
                         # Challenge only depends on this content, remove it completely
+                        del challenges[challenge_uuid]
                         challenges_to_remove.append(challenge_uuid)
-                        logger.info(f"Marking challenge {challenge_uuid} for removal (only source: {content_name})")
-                    else:
-                        # Challenge is interdisciplinary, just remove this content from sources
-                        updated_source_contents = [sc for sc in source_contents if sc != content_name]
-                        challenge_info["source_contents"] = updated_source_contents
-                        challenge_info["interdisciplinary"] = len(updated_source_contents) > 1
-                        updated_challenges[challenge_uuid] = challenge_info
-                        logger.info(f"Updated challenge {challenge_uuid} to remove source {content_name}, remaining sources: {updated_source_contents}")
-                else:
-                    # Challenge doesn't use this content, keep as is
-                    updated_challenges[challenge_uuid] = challenge_info
+                        if debug_enabled:
+                            logger.debug("Marking challenge %s for removal (only source: %s)", challenge_uuid, content_name)
+                        continue
+                    
+                    # Challenge is interdisciplinary, just remove this content from sources
+                    source_contents = [sc for sc in source_contents if sc != content_name]
+                    challenge_info["source_contents"] = source_contents
+                    challenge_info["interdisciplinary"] = len(source_contents) > 1
+                    updated_count += 1
+                    if debug_enabled:
+                        logger.debug("Updated challenge %s to remove source %s, remaining sources: %s",
+                                     challenge_uuid, content_name, source_contents)
+                
+                all_sources.update(source_contents)
             
             # Remove challenge files
             challenges_dir = self.generated_dir / "experiment" / "challenges"
@@ -562,25 +1028,31 @@ class SyncClient:
                 challenge_file = challenges_dir / f"{challenge_uuid}.json"
                 if challenge_file.exists():
                     challenge_file.unlink()
-                    logger.info(f"Removed challenge file: {challenge_file}")
+                    if debug_enabled:
+                        logger.debug("Removed challenge file: %s", challenge_file)
             
             # Update registry
-            if challenges_to_remove or len(updated_challenges) != len(registry_data.get("challenges", {})):
-                registry_data["challenges"] = updated_challenges
-                registry_data["metadata"]["total_challenges"] = len(updated_challenges)
+            if challenges_to_remove or updated_count:
+                registry_data["metadata"]["total_challenges"] = len(challenges)
                 registry_data["metadata"]["last_updated"] = datetime.now().isoformat()
                 
                 # Update content sources in metadata
-                all_sources = set()
-                for challenge_info in updated_challenges.values():
-                    all_sources.update(challenge_info.get("source_contents", []))
-                registry_data["metadata"]["content_sources"] = sorted(list(all_sources))
+                registry_data["metadata"]["content_sources"] = sorted(all_sources)
                 
-                # Save updated registry
-                with open(challenges_registry_file, 'w', encoding='utf-8') as f:
-                    json.dump(registry_data, f, indent=2, ensure_ascii=False)
+                # Save updated registry atomically (write alongside, then swap in)
+                tmp_file = challenges_registry_file.with_name(challenges_registry_file.name + ".tmp")
+                with open(tmp_file, 'wb') as f:
+                    f.write(_json_dumps_pretty(registry_data))
+                os.replace(tmp_file, challenges_registry_file)
+                self._progress_cache[challenges_registry_file] = (challenges_registry_file.stat().st_mtime_ns, registry_data)
                 
-                logger.info(f"Updated challenges registry: removed {len(challenges_to_remove)} challenges, updated {len(updated_challenges)} remaining")
+                logger.debug(
+                    "Updated challenges registry: removed %d challenges, %d remaining",
+                    len(challenges_to_remove), len(challenges)
+                )
+            elif cached_registry is not None:
+                # Nothing referenced this content, the cached registry is still accurate
+                self._progress_cache[challenges_registry_file] = cached_registry
         
         except Exception as e:
             logger.error(f"Error removing experiment challenges for content {content_name}: {e}")
@@ -0,0 +1,52 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+"""
+Optional compiled statement renderer for the xAPI logger
+
+Build in place (from this directory) with:
+    cythonize -i xapi_fast.pyx
+xapi_logger uses its pure-Python renderer when this module isn't built.
+"""
+
+from cpython.bytes cimport PyBytes_AS_STRING, PyBytes_FromStringAndSize, PyBytes_GET_SIZE
+from libc.string cimport memcpy
+
+
+cpdef bytes render(tuple fragments, tuple values, object dumps):
+    """Fill a compiled template: constant fragments interleaved with dumps(value)
+    
+    bytes values are already-encoded JSON and are copied verbatim.
+    """
+    cdef Py_ssize_t count = len(values)
+    cdef Py_ssize_t total = PyBytes_GET_SIZE(fragments[0])
+    cdef Py_ssize_t i, size, pos
+    cdef object value
+    cdef bytes piece, out
+    cdef char *dest
+    cdef list encoded = [None] * count
+    
+    for i in range(count):
+        value = values[i]
+        piece = value if type(value) is bytes else dumps(value)
+        encoded[i] = piece
+        total += PyBytes_GET_SIZE(piece) + PyBytes_GET_SIZE(fragments[i + 1])
+    
+    out = PyBytes_FromStringAndSize(NULL, total)
+    dest = PyBytes_AS_STRING(out)
+    
+    piece = fragments[0]
+    size = PyBytes_GET_SIZE(piece)
+    memcpy(dest, PyBytes_AS_STRING(piece), size)
+    pos = size
+    
+    for i in range(count):
+        piece = encoded[i]
+        size = PyBytes_GET_SIZE(piece)
+        memcpy(dest + pos, PyBytes_AS_STRING(piece), size)
+        pos += size
+        
+        piece = fragments[i + 1]
+        size = PyBytes_GET_SIZE(piece)
+        memcpy(dest + pos, PyBytes_AS_STRING(piece), size)
+        pos += size
+    
+    return out
@@ -3,11 +3,27 @@ xAPI (Experience API) Logger for Student Activity Tracking
 Logs all student interactions in xAPI format to logs/student.log
 """
 
+import atexit
+import functools
 import json
 import logging
-from datetime import datetime
+import os
+import queue
+import re
+import struct
+import threading
+import time
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterator, Optional, Tuple
+
+from student_profile import load_student_profile
+
+# Fast JSON codec (optional) - falls back to the standard library
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -17,178 +33,549 @@ LOGS_DIR = Path("logs")
 LOGS_DIR.mkdir(exist_ok=True)
 STUDENT_LOG_FILE = LOGS_DIR / "student.log"
 
+# Absolute, pre-encoded log path handed straight to os.open (see reconfigure_path)
+_STUDENT_LOG_PATH: bytes = os.fsencode(str(STUDENT_LOG_FILE.resolve()))
+
+# xAPI verbs (shared, never mutated - statements embed these dicts as-is)
+VERB_EXPERIENCED = {"id": "http://adlnet.gov/expapi/verbs/experienced", "display": {"en": "experienced"}}
+VERB_ANSWERED = {"id": "http://adlnet.gov/expapi/verbs/answered", "display": {"en": "answered"}}
+VERB_SUBMITTED = {"id": "http://adlnet.gov/expapi/verbs/submitted", "display": {"en": "submitted"}}
+VERB_EXPLORED = {"id": "http://adlnet.gov/expapi/verbs/explored", "display": {"en": "explored"}}
+
+# Base URI for activity ids and extension keys
+OBJ_BASE = "http://gemma-app.local"
+XAPI_EXT = f"{OBJ_BASE}/xapi/"
+
+# Extension keys
+EXT_QUESTION_TEXT = XAPI_EXT + "question_text"
+EXT_STUDENT_ANSWER = XAPI_EXT + "student_answer"
+EXT_FEEDBACK = XAPI_EXT + "feedback"
+EXT_FINAL_SUBMISSION = XAPI_EXT + "final_submission"
+EXT_SUBMISSION_ID = XAPI_EXT + "submission_id"
+EXT_AI_FEEDBACK = XAPI_EXT + "ai_feedback"
+EXT_SUBMISSION_TYPE = XAPI_EXT + "submission_type"
+EXT_QUESTIONS_EXPLORED = XAPI_EXT + "questions_explored"
+EXT_INITIAL_QUESTION = XAPI_EXT + "initial_question"
+EXT_SELECTED_QUESTIONS = XAPI_EXT + "selected_questions"
+EXT_IMAGE_UPLOADED = XAPI_EXT + "image_uploaded"
+EXT_FINAL_CHOICE = XAPI_EXT + "final_choice"
+
+# Constant object names/descriptions
+NAME_PRACTICE_QUESTION = {"en": "Practice Question"}
+DESC_PRACTICE_QUESTION = {"en": "Educational practice question"}
+DESC_CHALLENGE_SUBMISSION = {"en": "Experimental challenge submission"}
+
+# Placeholders in statement skeletons ("__NAME__") are cut out when templates are compiled
+_PLACEHOLDER = re.compile(rb'"__([A-Z_]+)__"')
+
+# Queue sentinel asking the writer thread to flush and exit
+_STOP = object()
+
+# Record framing: JSON Lines (default, what sync and existing readers expect) or
+# a 4-byte little-endian length prefix per statement (see iter_framed_statements)
+FRAMING_JSONL = 'jsonl'
+FRAMING_LEN = 'len'
+_LEN_PREFIX = struct.Struct('<I')
+
+# Minimum seconds between two error reports while the log file keeps failing
+_ERROR_REPORT_INTERVAL = 5.0
+
+# Queue marker: (_REOPEN, path) asks the writer thread to flush and switch log files
+_REOPEN = object()
+
+# Queue marker: (_FLUSH, event) asks the writer thread to write what it holds, then set event
+_FLUSH = object()
+
+# Scatter/gather writes (POSIX only) - a burst becomes one syscall without joining buffers
+_HAS_WRITEV = hasattr(os, 'writev')
+try:
+    _IOV_MAX = os.sysconf('SC_IOV_MAX') if _HAS_WRITEV else 1024
+except (ValueError, OSError):
+    _IOV_MAX = 1024
+if _IOV_MAX <= 0:
+    _IOV_MAX = 1024
+
+# Buffered statements are flushed once they reach this many bytes or this age (seconds)
+_FLUSH_BYTES = 64 * 1024
+_FLUSH_INTERVAL = 0.2
+
+# Appends up to this size land in the file as one unbroken record, even with
+# several processes (uvicorn workers) sharing the log - batches are split to fit
+_ATOMIC_APPEND = 4096
+
+def _dumps(statement: Dict[str, Any]) -> bytes:
+    """Encode a statement as compact UTF-8 JSON"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(statement)
+    return json.dumps(statement, ensure_ascii=False).encode('utf-8')
+
+def _statement_skeleton(verb: Dict[str, Any], name: Dict[str, str], description: Dict[str, str],
+                        result: Optional[Dict[str, Any]] = None,
+                        context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Basic xAPI statement structure with placeholders for actor, object id and timestamp"""
+    skeleton = {
+        "actor": "__ACTOR__",
+        "verb": verb,
+        "object": {
+            "id": "__OBJECT_ID__",
+            "definition": {
+                "name": name,
+                "description": description
+            }
+        },
+        "timestamp": "__TIMESTAMP__"
+    }
+    
+    if result:
+        skeleton["result"] = result
+    if context:
+        skeleton["context"] = context
+    
+    return skeleton
+
+def _compile_template(skeleton: Dict[str, Any], fields: Tuple[str, ...]) -> Tuple[bytes, ...]:
+    """Pre-encode a skeleton into the constant byte fragments between its placeholders"""
+    parts = _PLACEHOLDER.split(_dumps(skeleton))
+    names = tuple(name.decode('ascii') for name in parts[1::2])
+    if names != fields:
+        raise ValueError(f"Template placeholders {names} do not match expected fields {fields}")
+    return tuple(parts[0::2])
+
+def _render(fragments: Tuple[bytes, ...], values: Tuple[Any, ...]) -> bytes:
+    """Fill a compiled template: constant fragments interleaved with the encoded values"""
+    out = [fragments[0]]
+    for value, fragment in zip(values, fragments[1:]):
+        # bytes values are already-encoded JSON (e.g. the cached actor) and go in verbatim
+        out.append(value if type(value) is bytes else _dumps(value))
+        out.append(fragment)
+    return b''.join(out)
+
+# Compiled renderer (optional, see xapi_fast.pyx) - same output as _render
+try:
+    import xapi_fast
+    XAPI_FAST_AVAILABLE = True
+except ImportError:
+    XAPI_FAST_AVAILABLE = False
+
+if XAPI_FAST_AVAILABLE:
+    def _render(fragments: Tuple[bytes, ...], values: Tuple[Any, ...]) -> bytes:
+        """Fill a compiled template using the xapi_fast extension"""
+        return xapi_fast.render(fragments, values, _dumps)
+
+@functools.lru_cache(maxsize=512)
+def _prettify(name: str) -> str:
+    """Display form of a content name ("solar_system" -> "Solar System"), memoized per name"""
+    return name.replace('_', ' ').title()
+
+def _truncate(text: str, limit: int = 500) -> str:
+    """Return text unchanged when short enough, otherwise its first limit chars plus '...'"""
+    return text if len(text) <= limit else f"{text[:limit]}..."
+
+# Bumped whenever the student profile changes; cached actors older than this are rebuilt
+_ACTOR_VERSION = 0
+
+def invalidate_actor():
+    """Mark the cached xAPI actor stale (call after profile.json is written)"""
+    global _ACTOR_VERSION
+    _ACTOR_VERSION += 1
+
+# (epoch second, "YYYY-MM-DDTHH:MM:SS") of the last formatted timestamp
+_ts_cache = (-1, "")
+
+def _fast_iso(ns: int) -> str:
+    """Format epoch nanoseconds as 'YYYY-MM-DDTHH:MM:SS.mmmZ' (UTC) without a datetime"""
+    global _ts_cache
+    seconds, remainder = divmod(ns, 1_000_000_000)
+    cached_seconds, prefix = _ts_cache
+    if cached_seconds != seconds:
+        prefix = time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(seconds))
+        _ts_cache = (seconds, prefix)
+    return f"{prefix}.{remainder // 1_000_000:03d}Z"
+
+# Per-method statement templates; values are passed in placeholder order
+_TPL_NAVIGATION = _compile_template(
+    _statement_skeleton(
+        VERB_EXPERIENCED, {"en": "__NAME__"}, {"en": "__DESCRIPTION__"},
+        context={
+            "category": "learn",
+            "type": "__CONTENT_TYPE__",  # "textbook" or "story"
+            "section": "__SECTION__"     # "3"
+        }
+    ),
+    ("ACTOR", "OBJECT_ID", "NAME", "DESCRIPTION", "TIMESTAMP", "CONTENT_TYPE", "SECTION")
+)
+
+_ANSWERED_CONTEXT = {
+    "extensions": {
+        EXT_QUESTION_TEXT: "__QUESTION_TEXT__",
+        EXT_STUDENT_ANSWER: "__STUDENT_ANSWER__",
+        EXT_FEEDBACK: "__FEEDBACK__"
+    }
+}
+
+# The result object is part of the template too; a scored answer just uses a second one
+_TPL_ANSWERED = _compile_template(
+    _statement_skeleton(
+        VERB_ANSWERED, NAME_PRACTICE_QUESTION, DESC_PRACTICE_QUESTION,
+        result={
+            "response": "__RESPONSE__",
+            "success": "__SUCCESS__"
+        },
+        context=_ANSWERED_CONTEXT
+    ),
+    ("ACTOR", "OBJECT_ID", "TIMESTAMP", "RESPONSE", "SUCCESS",
+     "QUESTION_TEXT", "STUDENT_ANSWER", "FEEDBACK")
+)
+
+_TPL_ANSWERED_SCORED = _compile_template(
+    _statement_skeleton(
+        VERB_ANSWERED, NAME_PRACTICE_QUESTION, DESC_PRACTICE_QUESTION,
+        result={
+            "response": "__RESPONSE__",
+            "success": "__SUCCESS__",
+            "score": {
+                "raw": "__SCORE_RAW__",
+                "max": "__SCORE_MAX__"
+            }
+        },
+        context=_ANSWERED_CONTEXT
+    ),
+    ("ACTOR", "OBJECT_ID", "TIMESTAMP", "RESPONSE", "SUCCESS", "SCORE_RAW", "SCORE_MAX",
+     "QUESTION_TEXT", "STUDENT_ANSWER", "FEEDBACK")
+)
+
+_TPL_SUBMITTED = _compile_template(
+    _statement_skeleton(
+        VERB_SUBMITTED, {"en": "__NAME__"}, DESC_CHALLENGE_SUBMISSION,
+        result={
+            "completion": True,
+            "response": "__RESPONSE__",
+            "extensions": {
+                EXT_FINAL_SUBMISSION: "__FINAL_SUBMISSION__"
+            }
+        },
+        context={
+            "extensions": {
+                EXT_SUBMISSION_ID: "__SUBMISSION_ID__",
+                EXT_AI_FEEDBACK: "__AI_FEEDBACK__",
+                EXT_SUBMISSION_TYPE: "__SUBMISSION_TYPE__"
+            }
+        }
+    ),
+    ("ACTOR", "OBJECT_ID", "NAME", "TIMESTAMP", "RESPONSE", "FINAL_SUBMISSION",
+     "SUBMISSION_ID", "AI_FEEDBACK", "SUBMISSION_TYPE")
+)
+
+_TPL_EXPLORED = _compile_template(
+    _statement_skeleton(
+        VERB_EXPLORED, {"en": "__NAME__"}, {"en": "__DESCRIPTION__"},
+        result={
+            "completion": True,
+            "response": "__RESPONSE__",
+            "extensions": {
+                EXT_QUESTIONS_EXPLORED: "__QUESTIONS_EXPLORED__"
+            }
+        },
+        context={
+            "extensions": {
+                EXT_INITIAL_QUESTION: "__INITIAL_QUESTION__",
+                EXT_SELECTED_QUESTIONS: "__SELECTED_QUESTIONS__",
+                EXT_IMAGE_UPLOADED: True,
+                EXT_FINAL_CHOICE: "__FINAL_CHOICE__"
+            }
+        }
+    ),
+    ("ACTOR", "OBJECT_ID", "NAME", "DESCRIPTION", "TIMESTAMP", "RESPONSE", "QUESTIONS_EXPLORED",
+     "INITIAL_QUESTION", "SELECTED_QUESTIONS", "FINAL_CHOICE")
+)
+
+# Per-method verb specs: (template, verb display, object id prefix, fixed object name or None).
+# Log methods pass their spec directly, so nothing is looked up by key per event.
+# Templates with a NAME placeholder take the object name as their first definition value
+_VERB_NAVIGATION = (_TPL_NAVIGATION, "experienced", f"{OBJ_BASE}/content/", None)
+_VERB_ANSWERED = (_TPL_ANSWERED, "answered", f"{OBJ_BASE}/questions/", NAME_PRACTICE_QUESTION["en"])
+_VERB_ANSWERED_SCORED = (_TPL_ANSWERED_SCORED, "answered", f"{OBJ_BASE}/questions/", NAME_PRACTICE_QUESTION["en"])
+_VERB_SUBMITTED = (_TPL_SUBMITTED, "submitted", f"{OBJ_BASE}/challenges/", None)
+_VERB_EXPLORED = (_TPL_EXPLORED, "explored", f"{OBJ_BASE}/discovery/", None)
+
+def _atomic_chunks(batch: list):
+    """
+    Group encoded statements into writes that each fit one atomic append
+    
+    Yields (statements, total_size). A statement larger than _ATOMIC_APPEND is
+    written on its own; nothing is ever split across two writes.
+    """
+    chunk = []
+    size = 0
+    for line in batch:
+        n = len(line)
+        if chunk and (size + n > _ATOMIC_APPEND or len(chunk) >= _IOV_MAX):
+            yield chunk, size
+            chunk = []
+            size = 0
+        chunk.append(line)
+        size += n
+    if chunk:
+        yield chunk, size
+
 class XAPILogger:
     """xAPI compliant logger for student learning activities"""
     
-    def __init__(self):
-        pass
+    def __init__(self, framing: str = FRAMING_JSONL, path: Optional[bytes] = None):
+        if framing not in (FRAMING_JSONL, FRAMING_LEN):
+            raise ValueError(f"Unknown xAPI log framing: {framing}")
+        self._framing = framing
+        
+        # Encoded actor JSON for the current profile, valid while _actor_version == _ACTOR_VERSION
+        self._actor_cache = None
+        self._actor_version = -1
+        
+        # One long-lived append-only descriptor: a single write() per statement,
+        # no open/close per event (O_APPEND keeps concurrent appends whole)
+        self._fd = self._open(path or _STUDENT_LOG_PATH)
+        
+        # Write failures since the last report, and when that report was made
+        self._err_count = 0
+        self._last_err_ts = float('-inf')
+        
+        # Request handlers only enqueue; a background thread encodes and writes.
+        # SimpleQueue is the multi-producer/single-consumer hand-off: a put is one
+        # C-level append, so producer latency stays flat however slow the disk is
+        self._q = queue.SimpleQueue()
+        self._writer = threading.Thread(target=self._drain, name="xapi-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+    
+    @staticmethod
+    def _open(path: bytes) -> int:
+        """Open the log file for appending and return its descriptor"""
+        return os.open(
+            path,
+            os.O_WRONLY | os.O_CREAT | os.O_APPEND | getattr(os, 'O_BINARY', 0),
+            0o644
+        )
+    
+    def reopen(self, path: bytes):
+        """Switch to another log file once every statement queued so far is written"""
+        self._q.put((_REOPEN, path))
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every statement queued so far is on disk (False if timeout expires first)"""
+        if not self._writer.is_alive():
+            return True
+        done = threading.Event()
+        self._q.put((_FLUSH, done))
+        return done.wait(timeout)
+    
+    def close(self):
+        """Flush pending statements, stop the writer thread and close the log file"""
+        if self._writer.is_alive():
+            self._q.put(_STOP)
+            self._writer.join()
+            os.close(self._fd)
+    
+    def _drain(self):
+        """Writer thread: render queued statements and flush them in size/latency-bounded batches"""
+        q = self._q
+        batch = []
+        pending = 0
+        deadline = None  # monotonic time by which the oldest buffered statement must be written
+        
+        while True:
+            try:
+                if deadline is None:
+                    statement = q.get()
+                else:
+                    statement = q.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                statement = None
+            
+            if (statement is not None and statement is not _STOP
+                    and statement[0] is not _REOPEN and statement[0] is not _FLUSH):
+                try:
+                    payload = _render(*statement)
+                    if self._framing == FRAMING_JSONL:
+                        line = payload + b'\n'
+                    else:
+                        line = _LEN_PREFIX.pack(len(payload)) + payload
+                except Exception as e:
+                    logger.error(f"Error encoding xAPI statement: {e}")
+                    continue
+                batch.append(line)
+                pending += len(line)
+                if deadline is None:
+                    deadline = time.monotonic() + _FLUSH_INTERVAL
+                # Keep buffering until the batch is big enough or has waited long enough
+                if pending < _FLUSH_BYTES and time.monotonic() < deadline:
+                    continue
+            
+            if batch:
+                try:
+                    self._write_batch(batch)
+                except OSError as e:
+                    self._report_write_error(e, len(batch))
+                batch = []
+                pending = 0
+            deadline = None
+            
+            if statement is _STOP:
+                return
+            if statement is not None and statement[0] is _FLUSH:
+                statement[1].set()
+                continue
+            if statement is not None and statement[0] is _REOPEN:
+                reopen_path = statement[1]
+                try:
+                    fd = self._open(reopen_path)
+                except OSError as e:
+                    logger.error(f"Error opening xAPI log {os.fsdecode(reopen_path)}: {e}")
+                else:
+                    os.close(self._fd)
+                    self._fd = fd
+    
+    def _write_batch(self, batch: list):
+        """Write encoded statements with as few syscalls as possible (writev where available)"""
+        for chunk, expected in _atomic_chunks(batch):
+            if _HAS_WRITEV:
+                written = os.writev(self._fd, chunk)
+            else:
+                written = os.write(self._fd, b''.join(chunk))
+            if written < expected:
+                # Short write - keep writing the remainder so no statement is cut in half
+                rest = memoryview(b''.join(chunk))[written:]
+                while rest:
+                    rest = rest[os.write(self._fd, rest):]
+    
+    def _report_write_error(self, error: OSError, lost: int):
+        """Log write failures at most once per _ERROR_REPORT_INTERVAL instead of once per batch"""
+        self._err_count += lost
+        now = time.monotonic()
+        if now - self._last_err_ts > _ERROR_REPORT_INTERVAL:
+            logger.error(f"Error logging xAPI statement: {error} ({self._err_count} statements lost)")
+            self._err_count = 0
+            self._last_err_ts = now
     
-    def _get_current_actor(self) -> Dict[str, Any]:
-        """Get current actor based on current student profile"""
-        from student_profile import get_current_student_profile
+    def _get_current_actor(self) -> bytes:
+        """Get the current actor as encoded JSON (cached until invalidate_actor())"""
+        version = _ACTOR_VERSION
+        if self._actor_version == version:
+            return self._actor_cache
         
-        profile = get_current_student_profile()
+        profile = load_student_profile()
         
         if profile is None:
             # No profile available - use default values
-            return {
+            actor = {
                 "name": "anonymous_student",
                 "account": {
                     "name": "Anonymous Student"
                 }
             }
-        
-        # Use actual profile data
-        student_id = profile.get('student_id', 'unknown_id')
-        student_name = profile.get('student_name', 'Unknown Student')
-        
-        return {
-            "name": student_id,
-            "account": {
-                "name": student_name
-            }
-        }
-    
-    def _create_statement(self, verb_id: str, verb_display: str, object_id: str, 
-                         object_name: str, object_description: str, 
-                         result: Optional[Dict[str, Any]] = None,
-                         context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-        """Create a basic xAPI statement structure"""
-        statement = {
-            "actor": self._get_current_actor(),
-            "verb": {
-                "id": verb_id,
-                "display": {"en": verb_display}
-            },
-            "object": {
-                "id": object_id,
-                "definition": {
-                    "name": {"en": object_name},
-                    "description": {"en": object_description}
+        else:
+            # Use actual profile data
+            actor = {
+                "name": profile.student_id,
+                "account": {
+                    "name": profile.student_name
                 }
-            },
-            "timestamp": datetime.utcnow().isoformat() + "Z"
-        }
+            }
         
-        if result:
-            statement["result"] = result
-        if context:
-            statement["context"] = context
-            
-        return statement
+        actor_bytes = _dumps(actor)
+        self._actor_cache = actor_bytes
+        self._actor_version = version
+        return actor_bytes
     
-    def _log_statement(self, statement: Dict[str, Any]):
-        """Write statement to student.log file"""
-        try:
-            with open(STUDENT_LOG_FILE, 'a', encoding='utf-8') as f:
-                f.write(json.dumps(statement, ensure_ascii=False) + '\n')
-            logger.info(f"xAPI statement logged: {statement['verb']['display']['en']} - {statement['object']['definition']['name']['en']}")
-        except Exception as e:
-            logger.error(f"Error logging xAPI statement: {e}")
+    def _emit(self, verb: tuple, object_key: str, definition: Tuple[str, ...], fields: Tuple[Any, ...]):
+        """
+        Queue one statement for the writer thread (appended to student.log)
+        
+        Args:
+            verb: One of the _VERB_* specs
+            object_key: Activity id suffix appended to the verb's object prefix
+            definition: Variable object name/description values, in template order
+            fields: Remaining template values after the timestamp (result, context)
+        """
+        template, verb_display, object_prefix, fixed_name = verb
+        self._q.put((template, (
+            self._get_current_actor(),
+            object_prefix + object_key,
+            *definition,
+            _fast_iso(time.time_ns()),
+            *fields
+        )))
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("xAPI statement logged: %s - %s", verb_display, fixed_name or definition[0])
     
     def log_content_navigation(self, content_name: str, content_type: str, section: str):
         """Log when student navigates to specific content section"""
-        statement = self._create_statement(
-            verb_id="http://adlnet.gov/expapi/verbs/experienced",
-            verb_display="experienced",
-            object_id=f"http://gemma-app.local/content/{content_name}",
-            object_name=f"{content_name.replace('_', ' ').title()} Content",
-            object_description=f"Educational content: {content_name}",
-            context={
-                "category": "learn",
-                "type": content_type,  # "textbook" or "story"
-                "section": section     # "3"
-            }
-        )
-        self._log_statement(statement)
+        self._emit(_VERB_NAVIGATION, content_name, (
+            f"{_prettify(content_name)} Content",
+            f"Educational content: {content_name}"
+        ), (content_type, section))
     
     def log_question_answered(self, question_id: str, question_text: str, 
                              student_answer: str, is_correct: bool, 
                              feedback: str, score_raw: int = None, score_max: int = None):
         """Log when student answers a practice question"""
-        result = {
-            "response": student_answer,
-            "success": is_correct
-        }
-        
         if score_raw is not None and score_max is not None:
-            result["score"] = {
-                "raw": score_raw,
-                "max": score_max
-            }
-        
-        statement = self._create_statement(
-            verb_id="http://adlnet.gov/expapi/verbs/answered",
-            verb_display="answered",
-            object_id=f"http://gemma-app.local/questions/{question_id}",
-            object_name="Practice Question",
-            object_description="Educational practice question",
-            result=result,
-            context={
-                "extensions": {
-                    "http://gemma-app.local/xapi/question_text": question_text,
-                    "http://gemma-app.local/xapi/student_answer": student_answer,
-                    "http://gemma-app.local/xapi/feedback": feedback
-                }
-            }
-        )
-        self._log_statement(statement)
+            self._emit(_VERB_ANSWERED_SCORED, question_id, (), (
+                student_answer, is_correct, score_raw, score_max,
+                question_text, student_answer, feedback
+            ))
+        else:
+            self._emit(_VERB_ANSWERED, question_id, (), (
+                student_answer, is_correct, question_text, student_answer, feedback
+            ))
     
     def log_challenge_submitted(self, challenge_id: str, challenge_title: str,
                                submission_id: str, submission_content: str,
                                ai_feedback: str, is_final_submission: bool,
                                submission_type: str = "text"):
         """Log when student submits a challenge"""
-        statement = self._create_statement(
-            verb_id="http://adlnet.gov/expapi/verbs/submitted",
-            verb_display="submitted",
-            object_id=f"http://gemma-app.local/challenges/{challenge_id}",
-            object_name=challenge_title,
-            object_description="Experimental challenge submission",
-            result={
-                "completion": True,
-                "response": submission_content[:500] + "..." if len(submission_content) > 500 else submission_content,
-                "extensions": {
-                    "http://gemma-app.local/xapi/final_submission": is_final_submission
-                }
-            },
-            context={
-                "extensions": {
-                    "http://gemma-app.local/xapi/submission_id": submission_id,
-                    "http://gemma-app.local/xapi/ai_feedback": ai_feedback,
-                    "http://gemma-app.local/xapi/submission_type": submission_type
-                }
-            }
-        )
-        self._log_statement(statement)
+        self._emit(_VERB_SUBMITTED, challenge_id, (challenge_title,), (
+            _truncate(submission_content),
+            is_final_submission,
+            submission_id,
+            ai_feedback,
+            submission_type
+        ))
     
     def log_discovery_exploration(self, investigation_id: str, subject_identified: str,
                                  initial_question: str, selected_questions: list,
                                  final_choice: str, questions_explored: int):
         """Log when student completes a discovery investigation"""
-        statement = self._create_statement(
-            verb_id="http://adlnet.gov/expapi/verbs/explored",
-            verb_display="explored",
-            object_id=f"http://gemma-app.local/discovery/{investigation_id}",
-            object_name=f"Discovery Investigation: {subject_identified}",
-            object_description=f"Student investigation about {subject_identified}",
-            result={
-                "completion": True,
-                "response": final_choice,
-                "extensions": {
-                    "http://gemma-app.local/xapi/questions_explored": questions_explored
-                }
-            },
-            context={
-                "extensions": {
-                    "http://gemma-app.local/xapi/initial_question": initial_question,
-                    "http://gemma-app.local/xapi/selected_questions": selected_questions,
-                    "http://gemma-app.local/xapi/image_uploaded": True,
-                    "http://gemma-app.local/xapi/final_choice": final_choice
-                }
-            }
-        )
-        self._log_statement(statement)
+        self._emit(_VERB_EXPLORED, investigation_id, (
+            f"Discovery Investigation: {subject_identified}",
+            f"Student investigation about {subject_identified}"
+        ), (final_choice, questions_explored, initial_question, selected_questions, final_choice))
 
 # Global instance
-xapi_logger = XAPILogger()
\ No newline at end of file
+xapi_logger = XAPILogger()
+
+def iter_framed_statements(path) -> Iterator[Dict[str, Any]]:
+    """
+    Read back a log written with FRAMING_LEN, one decoded statement at a time
+    
+    A record cut short at the end of the file (writer still running) is ignored.
+    """
+    loads = orjson.loads if ORJSON_AVAILABLE else json.loads
+    header_size = _LEN_PREFIX.size
+    with open(path, 'rb') as f:
+        data = f.read()
+    pos = 0
+    end = len(data)
+    while pos + header_size <= end:
+        (size,) = _LEN_PREFIX.unpack_from(data, pos)
+        pos += header_size
+        if pos + size > end:
+            break
+        yield loads(data[pos:pos + size])
+        pos += size
+
+def reconfigure_path(new_path):
+    """Point the xAPI log at another file (the directory is created if missing)"""
+    global _STUDENT_LOG_PATH
+    path = Path(new_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    _STUDENT_LOG_PATH = os.fsencode(str(path.resolve()))
+    xapi_logger.reopen(_STUDENT_LOG_PATH)
\ No newline at end of file
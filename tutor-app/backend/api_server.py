@@ -3,21 +3,67 @@ FastAPI Server for Tutor App Backend
 Manages students and content assignment
 """
 
+import asyncio
+import codecs
+import functools
+import gzip
+import hashlib
+import io
 import json
 import logging
 import mimetypes
 import os
+import shutil
+import stat
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote
 
+import aiofiles
 import uvicorn
-from fastapi import FastAPI, HTTPException, File, UploadFile
+from fastapi import BackgroundTasks, Depends, FastAPI, HTTPException, File, UploadFile, Request
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
-from pydantic import BaseModel
+from fastapi.responses import FileResponse, JSONResponse, ORJSONResponse, Response
+from pydantic import BaseModel, PrivateAttr, TypeAdapter, ValidationError
 from sync_service import SyncService, SyncRequest, SyncResponse
 
+# Fast JSON responses (optional) - falls back to FastAPI's standard JSONResponse
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# zstd request decompression (optional) - gzip is always accepted
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+# uvloop event loop and httptools parser (optional, not available on Windows)
+try:
+    import uvloop  # noqa: F401
+    UVLOOP_AVAILABLE = True
+except ImportError:
+    UVLOOP_AVAILABLE = False
+
+try:
+    import httptools  # noqa: F401
+    HTTPTOOLS_AVAILABLE = True
+except ImportError:
+    HTTPTOOLS_AVAILABLE = False
+
+# Request Content-Encodings accepted on /api/sync/from-student (advertised via /api/sync/discover)
+SYNC_CONTENT_ENCODINGS = ["zstd", "gzip"] if ZSTD_AVAILABLE else ["gzip"]
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -25,8 +71,25 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """FastAPI lifespan context manager for startup/shutdown"""
+    # Startup
+    start_timestamp_ticker()
+    
+    yield  # App runs here
+    
+    # Shutdown
+    stop_timestamp_ticker()
+    await close_ollama_client()
+
 # Initialize FastAPI app
-app = FastAPI(title="Gemma Tutor API", version="1.0.0")
+app = FastAPI(
+    title="Gemma Tutor API",
+    version="1.0.0",
+    default_response_class=ORJSONResponse if ORJSON_AVAILABLE else JSONResponse,
+    lifespan=lifespan
+)
 
 # Configure CORS
 app.add_middleware(
@@ -45,6 +108,17 @@ CONTENT_DIR = Path("content")
 STUDENTS_DIR = Path("students")
 REPORTS_DIR = Path("reports")
 
+# Uploads are streamed to disk in chunks of this size, up to the size limit
+_UPLOAD_CHUNK_SIZE = 64 * 1024
+_MAX_UPLOAD_SIZE = 10 * 1024 * 1024  # 10MB
+
+# Shared pool for blocking disk work in async endpoints (copies, deletes, upload writes),
+# so independent file operations run side by side off the event loop
+_IO_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="tutor-io")
+
+# Read-ahead hints for files about to be copied (Linux and most POSIX systems)
+_HAS_FADVISE = hasattr(os, 'posix_fadvise')
+
 # Ensure directories exist
 CONTENT_DIR.mkdir(exist_ok=True)
 STUDENTS_DIR.mkdir(exist_ok=True)
@@ -60,6 +134,17 @@ class Student(BaseModel):
     display_name: Optional[str] = None  # Tutor's custom display name for the student
     assigned_files: Optional[List[str]] = []
     created_at: Optional[str] = None
+    
+    # Hashed view of assigned_files (not serialized), rebuilt whenever the file is loaded or saved
+    _assigned_set: frozenset = PrivateAttr(default=frozenset())
+    
+    def refresh_assigned_set(self) -> None:
+        """Rebuild _assigned_set from assigned_files"""
+        self._assigned_set = frozenset(self.assigned_files or ())
+
+# Serializers for list payloads: pydantic-core encodes straight to JSON bytes
+_STUDENTS_ADAPTER = TypeAdapter(List[Student])
+_FILES_ADAPTER = TypeAdapter(List[str])
 
 class CreateStudentRequest(BaseModel):
     id: str
@@ -71,65 +156,246 @@ class AssignFilesRequest(BaseModel):
 class UpdateDisplayNameRequest(BaseModel):
     display_name: str
 
+def _loads(raw: bytes):
+    """Parse UTF-8 JSON bytes"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+def _dumps(data) -> bytes:
+    """Encode data as compact UTF-8 JSON"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def _dumps_pretty(data) -> bytes:
+    """Encode data as indented UTF-8 JSON"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    return json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+
+# Parsed student files: file name -> ((st_mtime_ns, st_size), Student). A file is only
+# re-read when its mtime or size changes (sync_service also writes these files, so every
+# call stats them; the size catches rewrites within the filesystem's mtime granularity)
+_STUDENT_CACHE: Dict[str, Tuple[Tuple[int, int], Student]] = {}
+
 # Helper functions
+def _read_student_file(student_file: str) -> Student:
+    """Parse one student JSON file, applying the display_name migration if needed"""
+    with open(student_file, 'rb') as f:
+        data = _loads(f.read())
+    
+    # Migration: Add display_name if it doesn't exist
+    if 'display_name' not in data or data['display_name'] is None:
+        data['display_name'] = data['name']
+        # Save the updated data back to file
+        with open(student_file, 'wb') as f:
+            f.write(_dumps_pretty(data))
+        logger.info(f"Migrated student {data['id']}: added display_name = '{data['name']}'")
+    
+    student = Student(**data)
+    student.refresh_assigned_set()
+    return student
+
 def load_students() -> Dict[str, Student]:
-    """Load all students from JSON files"""
+    """Load all students from JSON files (unchanged files come from the cache)"""
     students = {}
+    seen = set()
     if STUDENTS_DIR.exists():
-        for student_file in STUDENTS_DIR.glob("*.json"):
-            try:
-                with open(student_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                
-                # Migration: Add display_name if it doesn't exist
-                if 'display_name' not in data or data['display_name'] is None:
-                    data['display_name'] = data['name']
-                    # Save the updated data back to file
-                    with open(student_file, 'w', encoding='utf-8') as f:
-                        json.dump(data, f, indent=2, ensure_ascii=False)
-                    logger.info(f"Migrated student {data['id']}: added display_name = '{data['name']}'")
-                
-                students[data['id']] = Student(**data)
-            except Exception as e:
-                logger.error(f"Error loading student {student_file}: {e}")
+        with os.scandir(STUDENTS_DIR) as entries:
+            for entry in entries:
+                name = entry.name
+                # is_file() comes from the readdir entry type - no extra stat for regular files
+                if not name.endswith('.json') or name.startswith('.') or not entry.is_file():
+                    continue
+                try:
+                    st = entry.stat()
+                    cached = _STUDENT_CACHE.get(name)
+                    if cached is not None and cached[0] == (st.st_mtime_ns, st.st_size):
+                        student = cached[1]
+                    else:
+                        student = _read_student_file(entry.path)
+                        # Re-stat: the migration may have just rewritten the file
+                        st = os.stat(entry.path)
+                        _STUDENT_CACHE[name] = ((st.st_mtime_ns, st.st_size), student)
+                    seen.add(name)
+                    students[student.id] = student
+                except Exception as e:
+                    logger.error(f"Error loading student {entry.path}: {e}")
+    
+    # Forget students whose files were deleted (list() snapshots the keys: sync
+    # endpoints call this from several threadpool workers at once)
+    for name in set(list(_STUDENT_CACHE)) - seen:
+        _STUDENT_CACHE.pop(name, None)
     return students
 
 def save_student(student: Student) -> None:
-    """Save student to JSON file"""
-    student_file = STUDENTS_DIR / f"{student.id}.json"
+    """Save student to JSON file (atomically, via a temp file and os.replace)"""
+    file_name = f"{student.id}.json"
+    student_file = STUDENTS_DIR / file_name
+    tmp_file = STUDENTS_DIR / f"{file_name}.tmp"
     try:
-        with open(student_file, 'w', encoding='utf-8') as f:
-            json.dump(student.model_dump(), f, indent=2, ensure_ascii=False)
+        data = _dumps_pretty(student.model_dump())
+        with open(tmp_file, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_file, student_file)
+        
+        # Keep the cache current so the next load_students() does not re-read the file
+        student.refresh_assigned_set()
+        st = os.stat(student_file)
+        _STUDENT_CACHE[file_name] = ((st.st_mtime_ns, st.st_size), student)
         logger.info(f"Saved student: {student.id} - {student.name}")
     except Exception as e:
+        # The file may or may not hold the new state - make the next load re-read it
+        _STUDENT_CACHE.pop(file_name, None)
+        try:
+            tmp_file.unlink()
+        except OSError:
+            pass
         logger.error(f"Error saving student {student.id}: {e}")
         raise
 
+# Informational response timestamps come from a once-per-second ticker instead of
+# datetime.now() per request; set COARSE_TIMESTAMPS=false for exact timestamps
+COARSE_TIMESTAMPS = os.environ.get("COARSE_TIMESTAMPS", "true").lower() == "true"
+_NOW_ISO: Optional[str] = None
+_timestamp_ticker: Optional[asyncio.Task] = None
+
+def now_iso() -> str:
+    """Current time for response payloads (cached to the second while the ticker runs)"""
+    cached = _NOW_ISO
+    return cached if cached is not None else datetime.now().isoformat()
+
+async def _tick_timestamp() -> None:
+    """Refresh the cached timestamp once per second"""
+    global _NOW_ISO
+    try:
+        while True:
+            _NOW_ISO = datetime.now().isoformat()
+            await asyncio.sleep(1.0)
+    finally:
+        _NOW_ISO = None
+
+def start_timestamp_ticker():
+    """Start the cached timestamp ticker"""
+    global _timestamp_ticker
+    if COARSE_TIMESTAMPS:
+        _timestamp_ticker = asyncio.ensure_future(_tick_timestamp())
+
+def stop_timestamp_ticker():
+    """Stop the cached timestamp ticker"""
+    if _timestamp_ticker is not None:
+        _timestamp_ticker.cancel()
+
+async def close_ollama_client():
+    """Release pooled Ollama connections (only if report generation was ever used)"""
+    module = sys.modules.get("ollama_service")
+    service = getattr(module, "ollama_service", None)
+    if service is not None:
+        await service.aclose()
+
+# (content dir st_mtime_ns, sorted .txt names); adding or removing a file bumps the mtime
+_CONTENT_FILES_CACHE: Optional[Tuple[int, List[str]]] = None
+
 def get_available_content_files() -> List[str]:
-    """Get list of available .txt files in content directory"""
-    files = []
-    if CONTENT_DIR.exists():
-        for txt_file in CONTENT_DIR.glob("*.txt"):
-            files.append(txt_file.name)
-    return sorted(files)
+    """Get list of available .txt files in content directory (shared list - do not modify)"""
+    global _CONTENT_FILES_CACHE
+    try:
+        dir_mtime_ns = CONTENT_DIR.stat().st_mtime_ns
+    except FileNotFoundError:
+        return []
+    
+    cached = _CONTENT_FILES_CACHE
+    if cached is not None and cached[0] == dir_mtime_ns:
+        return cached[1]
+    
+    with os.scandir(CONTENT_DIR) as entries:
+        files = sorted(
+            entry.name for entry in entries
+            if entry.name.endswith('.txt') and not entry.name.startswith('.') and entry.is_file()
+        )
+    _CONTENT_FILES_CACHE = (dir_mtime_ns, files)
+    return files
+
+def _invalidate_content_files() -> None:
+    """Drop the cached content listing (mtime granularity may hide a quick change)"""
+    global _CONTENT_FILES_CACHE
+    _CONTENT_FILES_CACHE = None
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check: "*" or any listed tag equal to etag (weak comparison, W/ ignored)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == opaque:
+            return True
+    return False
+
+def etag_json_response(request: Request, body: bytes) -> Response:
+    """JSON response with a content ETag; answers 304 when the client already has this body"""
+    etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+# (cached Student objects, encoded list_students body) - students are replaced, never
+# mutated in place, so an identical tuple of objects means an identical body
+_ROSTER_BODY_CACHE: Optional[Tuple[tuple, bytes]] = None
+
+async def run_io(func, *args):
+    """Run a blocking file operation on the shared I/O pool"""
+    return await asyncio.get_running_loop().run_in_executor(_IO_POOL, func, *args)
+
+def prefetch_files(paths) -> None:
+    """Hint the kernel to read files ahead (POSIX_FADV_WILLNEED); a no-op where unsupported"""
+    if not _HAS_FADVISE:
+        return
+    for path in paths:
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            continue
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+def get_students() -> Dict[str, Student]:
+    """Request dependency: the (cached) student roster, scanned once per request"""
+    return load_students()
 
 # API Endpoints
 
 @app.get("/api/students")
-async def list_students():
-    """Get all students"""
+def list_students(request: Request, students: Dict[str, Student] = Depends(get_students)):
+    """Get all students (polled by the frontend - honours If-None-Match)"""
+    global _ROSTER_BODY_CACHE
     try:
-        students = load_students()
-        return {
-            "success": True,
-            "students": [student.model_dump() for student in students.values()]
-        }
+        roster = tuple(students.values())
+        cached = _ROSTER_BODY_CACHE
+        if (cached is not None and len(cached[0]) == len(roster)
+                and all(a is b for a, b in zip(cached[0], roster))):
+            body = cached[1]
+        else:
+            payload = _STUDENTS_ADAPTER.dump_json(list(roster))
+            body = b'{"success":true,"students":' + payload + b'}'
+            _ROSTER_BODY_CACHE = (roster, body)
+        return etag_json_response(request, body)
     except Exception as e:
         logger.error(f"Error listing students: {e}")
         raise HTTPException(status_code=500, detail="Failed to load students")
 
 @app.post("/api/students")
-async def create_student(request: CreateStudentRequest):
+async def create_student(request: CreateStudentRequest, students: Dict[str, Student] = Depends(get_students)):
     """Create a new student"""
     try:
         # Validate ID format (6 digits)
@@ -137,7 +403,6 @@ async def create_student(request: CreateStudentRequest):
             raise HTTPException(status_code=400, detail="Student ID must be exactly 6 digits")
         
         # Check if student already exists
-        students = load_students()
         if request.id in students:
             raise HTTPException(status_code=400, detail="Student with this ID already exists")
         
@@ -172,7 +437,7 @@ async def create_student(request: CreateStudentRequest):
         raise HTTPException(status_code=500, detail="Failed to create student")
 
 @app.get("/api/content/available")
-async def list_available_content(student_id: Optional[str] = None):
+def list_available_content(student_id: Optional[str] = None):
     """Get available .txt files in content directory, optionally filtered by student assignments"""
     try:
         all_files = get_available_content_files()
@@ -181,8 +446,8 @@ async def list_available_content(student_id: Optional[str] = None):
         if student_id:
             students = load_students()
             if student_id in students:
-                assigned_files = students[student_id].assigned_files or []
-                available_files = [f for f in all_files if f not in assigned_files]
+                assigned_set = students[student_id]._assigned_set
+                available_files = [f for f in all_files if f not in assigned_set]
             else:
                 available_files = all_files
         else:
@@ -238,11 +503,6 @@ async def upload_content_file(file: UploadFile = File(...)):
         if not file.filename or not file.filename.endswith('.txt'):
             raise HTTPException(status_code=400, detail="Only .txt files are allowed")
         
-        # Validate file size (10MB max)
-        content = await file.read()
-        if len(content) > 10 * 1024 * 1024:  # 10MB in bytes
-            raise HTTPException(status_code=400, detail="File size must be less than 10MB")
-        
         # Sanitize filename to prevent path traversal
         filename = file.filename.replace('..', '').replace('/', '').replace('\\', '')
         if not filename or filename != file.filename:
@@ -253,22 +513,42 @@ async def upload_content_file(file: UploadFile = File(...)):
         if file_path.exists():
             raise HTTPException(status_code=409, detail=f"File '{filename}' already exists")
         
-        # Validate content is text (try to decode as UTF-8)
+        # Stream to a temp file, checking size (10MB max) and UTF-8 validity chunk by chunk
+        tmp_path = CONTENT_DIR / f".{filename}.upload"
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        size = 0
         try:
-            text_content = content.decode('utf-8')
-        except UnicodeDecodeError:
-            raise HTTPException(status_code=400, detail="File must contain valid UTF-8 text")
-        
-        # Save file to content directory
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(text_content)
+            async with aiofiles.open(tmp_path, 'wb', executor=_IO_POOL) as out:
+                while True:
+                    chunk = await file.read(_UPLOAD_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > _MAX_UPLOAD_SIZE:
+                        raise HTTPException(status_code=400, detail="File size must be less than 10MB")
+                    try:
+                        decoder.decode(chunk)
+                    except UnicodeDecodeError:
+                        raise HTTPException(status_code=400, detail="File must contain valid UTF-8 text")
+                    await out.write(chunk)
+            
+            try:
+                decoder.decode(b'', final=True)
+            except UnicodeDecodeError:
+                raise HTTPException(status_code=400, detail="File must contain valid UTF-8 text")
+            
+            await run_io(os.replace, tmp_path, file_path)
+            _invalidate_content_files()
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
         
         logger.info(f"Successfully uploaded content file: {filename}")
         
         return {
             "success": True,
             "filename": filename,
-            "size": len(content),
+            "size": size,
             "message": f"File '{filename}' uploaded successfully"
         }
         
@@ -279,7 +559,7 @@ async def upload_content_file(file: UploadFile = File(...)):
         raise HTTPException(status_code=500, detail="Failed to upload file")
 
 @app.delete("/api/content/{filename}")
-async def delete_content_file(filename: str):
+async def delete_content_file(filename: str, students: Dict[str, Student] = Depends(get_students)):
     """Delete a content file"""
     try:
         # Validate filename ends with .txt and exists
@@ -291,12 +571,10 @@ async def delete_content_file(filename: str):
             raise HTTPException(status_code=404, detail="File not found")
         
         # Check if file is assigned to any students before deleting
-        students = load_students()
         assigned_to_students = []
         for student_id, student_data in students.items():
-            if hasattr(student_data, 'assigned_files') and student_data.assigned_files:
-                if filename in student_data.assigned_files:
-                    assigned_to_students.append(f"{student_id} ({student_data.name})")
+            if filename in student_data._assigned_set:
+                assigned_to_students.append(f"{student_id} ({student_data.name})")
         
         if assigned_to_students:
             raise HTTPException(
@@ -306,6 +584,7 @@ async def delete_content_file(filename: str):
         
         # Delete the file
         file_path.unlink()
+        _invalidate_content_files()
         logger.info(f"Successfully deleted content file: {filename}")
         
         return {
@@ -321,19 +600,17 @@ async def delete_content_file(filename: str):
         raise HTTPException(status_code=500, detail="Failed to delete file")
 
 @app.get("/api/students/{student_id}/assigned")
-async def get_assigned_content(student_id: str):
+def get_assigned_content(student_id: str, students: Dict[str, Student] = Depends(get_students)):
     """Get content assigned to a specific student"""
     try:
-        students = load_students()
         if student_id not in students:
             raise HTTPException(status_code=404, detail="Student not found")
         
-        student = students[student_id]
-        return {
-            "success": True,
-            "files": student.assigned_files or [],
-            "count": len(student.assigned_files or [])
-        }
+        files = students[student_id].assigned_files or []
+        return Response(
+            content=b'{"success":true,"files":' + _FILES_ADAPTER.dump_json(files) + b',"count":%d}' % len(files),
+            media_type="application/json"
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -341,14 +618,14 @@ async def get_assigned_content(student_id: str):
         raise HTTPException(status_code=500, detail="Failed to load assigned content")
 
 @app.post("/api/students/{student_id}/assign")
-async def assign_content(student_id: str, request: AssignFilesRequest):
+async def assign_content(student_id: str, request: AssignFilesRequest, students: Dict[str, Student] = Depends(get_students)):
     """Assign content files to a student"""
     try:
-        students = load_students()
         if student_id not in students:
             raise HTTPException(status_code=404, detail="Student not found")
         
-        student = students[student_id]
+        # Work on a copy: the cached record must only change once the file is saved
+        student = students[student_id].model_copy(deep=True)
         available_files = get_available_content_files()
         
         # Validate that all requested files exist
@@ -356,28 +633,35 @@ async def assign_content(student_id: str, request: AssignFilesRequest):
             if file_name not in available_files:
                 raise HTTPException(status_code=400, detail=f"File '{file_name}' not found in content directory")
         
+        # Start reading the files to copy into the page cache while the first copies run
+        # (fire-and-forget on the I/O pool: one open + fadvise per file must not block the loop)
+        asyncio.get_running_loop().run_in_executor(
+            _IO_POOL, prefetch_files,
+            [CONTENT_DIR / f for f in request.files if f not in student._assigned_set])
+        
         # Add files to student's assigned list (avoid duplicates)
         if not student.assigned_files:
             student.assigned_files = []
         
         new_files = []
+        copies = []
+        student_content_dir = STUDENTS_DIR / student_id / "content"
         for file_name in request.files:
             if file_name not in student.assigned_files:
                 student.assigned_files.append(file_name)
                 new_files.append(file_name)
                 
-                # Copy file to student's content directory
                 source_file = CONTENT_DIR / file_name
-                target_file = STUDENTS_DIR / student_id / "content" / file_name
                 if source_file.exists():
-                    target_file.parent.mkdir(parents=True, exist_ok=True)
-                    with open(source_file, 'r', encoding='utf-8') as src:
-                        content = src.read()
-                    with open(target_file, 'w', encoding='utf-8') as tgt:
-                        tgt.write(content)
+                    copies.append((source_file, student_content_dir / file_name))
         
-        # Save updated student
-        save_student(student)
+        # Copy files to student's content directory, side by side on the I/O pool
+        if copies:
+            student_content_dir.mkdir(parents=True, exist_ok=True)
+            await asyncio.gather(*(run_io(shutil.copyfile, src, dst) for src, dst in copies))
+        
+        # Save updated student (on the I/O pool; a failed write becomes a 500)
+        await run_io(save_student, student)
         
         return {
             "success": True,
@@ -393,14 +677,14 @@ async def assign_content(student_id: str, request: AssignFilesRequest):
         raise HTTPException(status_code=500, detail="Failed to assign content")
 
 @app.delete("/api/students/{student_id}/unassign")
-async def unassign_content(student_id: str, request: AssignFilesRequest):
+async def unassign_content(student_id: str, request: AssignFilesRequest, students: Dict[str, Student] = Depends(get_students)):
     """Remove assigned content from a student"""
     try:
-        students = load_students()
         if student_id not in students:
             raise HTTPException(status_code=404, detail="Student not found")
         
-        student = students[student_id]
+        # Work on a copy: the cached record must only change once the file is saved
+        student = students[student_id].model_copy(deep=True)
         
         if not student.assigned_files:
             student.assigned_files = []
@@ -411,14 +695,16 @@ async def unassign_content(student_id: str, request: AssignFilesRequest):
             if file_name in student.assigned_files:
                 student.assigned_files.remove(file_name)
                 removed_files.append(file_name)
-                
-                # Remove file from student's content directory
-                target_file = STUDENTS_DIR / student_id / "content" / file_name
-                if target_file.exists():
-                    target_file.unlink()
         
-        # Save updated student
-        save_student(student)
+        # Remove the files from student's content directory (on the I/O pool)
+        student_content_dir = STUDENTS_DIR / student_id / "content"
+        await asyncio.gather(*(
+            run_io(functools.partial((student_content_dir / file_name).unlink, missing_ok=True))
+            for file_name in removed_files
+        ))
+        
+        # Save updated student (on the I/O pool; a failed write becomes a 500)
+        await run_io(save_student, student)
         
         return {
             "success": True,
@@ -434,10 +720,9 @@ async def unassign_content(student_id: str, request: AssignFilesRequest):
         raise HTTPException(status_code=500, detail="Failed to unassign content")
 
 @app.get("/api/students/{student_id}/folder")
-async def get_student_folder_path(student_id: str):
+def get_student_folder_path(student_id: str, students: Dict[str, Student] = Depends(get_students)):
     """Get the file system path to student's content folder"""
     try:
-        students = load_students()
         if student_id not in students:
             raise HTTPException(status_code=404, detail="Student not found")
         
@@ -458,10 +743,9 @@ async def get_student_folder_path(student_id: str):
         raise HTTPException(status_code=500, detail="Failed to get folder path")
 
 @app.put("/api/students/{student_id}/display-name")
-async def update_student_display_name(student_id: str, request: UpdateDisplayNameRequest):
+async def update_student_display_name(student_id: str, request: UpdateDisplayNameRequest, students: Dict[str, Student] = Depends(get_students)):
     """Update the display name for a student (tutor's view only)"""
     try:
-        students = load_students()
         if student_id not in students:
             raise HTTPException(status_code=404, detail="Student not found")
         
@@ -472,13 +756,13 @@ async def update_student_display_name(student_id: str, request: UpdateDisplayNam
         if len(request.display_name.strip()) > 100:
             raise HTTPException(status_code=400, detail="Display name must be less than 100 characters")
         
-        # Update display name
-        student = students[student_id]
+        # Update display name (on a copy, so the cached record only changes once saved)
+        student = students[student_id].model_copy(deep=True)
         old_display_name = student.display_name
         student.display_name = request.display_name.strip()
         
-        # Save updated student
-        save_student(student)
+        # Save updated student (on the I/O pool; a failed write becomes a 500)
+        await run_io(save_student, student)
         
         logger.info(f"Updated display name for student {student_id}: '{old_display_name}' -> '{student.display_name}'")
         
@@ -496,34 +780,30 @@ async def update_student_display_name(student_id: str, request: UpdateDisplayNam
         raise HTTPException(status_code=500, detail="Failed to update display name")
 
 @app.delete("/api/students/{student_id}")
-async def delete_student(student_id: str):
+async def delete_student(student_id: str, background_tasks: BackgroundTasks,
+                         students: Dict[str, Student] = Depends(get_students)):
     """Delete a student and all associated data"""
     try:
-        students = load_students()
         if student_id not in students:
             raise HTTPException(status_code=404, detail="Student not found")
         
         student = students[student_id]
         student_name = student.display_name or student.name
         
-        # Delete student JSON file
+        # Delete student JSON file (the student's next sync must resend its content)
+        sync_service.forget_content_fingerprint(student_id)
         student_file = STUDENTS_DIR / f"{student_id}.json"
         if student_file.exists():
             student_file.unlink()
         
-        # Delete student directories
-        student_content_dir = STUDENTS_DIR / student_id
-        reports_dir = REPORTS_DIR / student_id
-        
-        # Remove student content directory
-        if student_content_dir.exists():
-            import shutil
-            shutil.rmtree(student_content_dir)
-        
-        # Remove reports directory
-        if reports_dir.exists():
-            import shutil
-            shutil.rmtree(reports_dir)
+        # Delete student directories: renaming them away is instant, so the student is
+        # gone right now; the (possibly large) trees are removed after the response
+        gc_suffix = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+        for data_dir in (STUDENTS_DIR / student_id, REPORTS_DIR / student_id):
+            if data_dir.exists():
+                doomed_dir = data_dir.with_name(f".{student_id}.gc-{gc_suffix}")
+                os.replace(data_dir, doomed_dir)
+                background_tasks.add_task(shutil.rmtree, doomed_dir, ignore_errors=True)
         
         logger.info(f"Deleted student {student_id} ({student_name}) and all associated data")
         
@@ -540,45 +820,54 @@ async def delete_student(student_id: str):
         logger.error(f"Error deleting student {student_id}: {e}")
         raise HTTPException(status_code=500, detail="Failed to delete student")
 
+@functools.lru_cache(maxsize=256)
+def _mime_for_suffix(suffix: str) -> Optional[str]:
+    """Mime type for a lowercased file suffix (memoized - listings repeat a few extensions)"""
+    return mimetypes.guess_type("x" + suffix)[0]
+
+def guess_mime_type(name: str) -> Optional[str]:
+    """Guess a file's mime type from its name"""
+    suffix = os.path.splitext(name)[1].lower()
+    if suffix in mimetypes.encodings_map:
+        # Compressed files (.tar.gz) depend on the inner suffix too
+        return mimetypes.guess_type(name)[0]
+    return _mime_for_suffix(suffix)
+
+# Top-level folders shown when browsing a student (see validate_path_security)
+_BROWSE_ROOTS = frozenset({"reports", "students"})
+
+@functools.lru_cache(maxsize=1024)
+def _resolved_base(kind: str, student_id: str) -> Tuple[Path, str]:
+    """Resolved per-student base directory ("reports" or "students") and its str form"""
+    root = REPORTS_DIR if kind == "reports" else STUDENTS_DIR
+    base_dir = (root / student_id).resolve()
+    return base_dir, str(base_dir)
+
 def validate_path_security(requested_path: str, student_id: str) -> Path:
     """Validate and secure file paths to prevent directory traversal attacks"""
     try:
         # Remove any path traversal attempts
         clean_path = os.path.normpath(requested_path).lstrip(os.sep)
         
-        # Determine the base directory based on the path structure
-        if clean_path.startswith("reports/"):
-            # Reports folder access
-            base_dir = REPORTS_DIR / student_id
-            relative_path = clean_path[8:] if len(clean_path) > 8 else ""  # Remove "reports/" prefix
-        elif clean_path.startswith("students/"):
-            # Student folder access  
-            base_dir = STUDENTS_DIR / student_id
-            relative_path = clean_path[9:] if len(clean_path) > 9 else ""  # Remove "students/" prefix
-        elif clean_path == "reports":
-            # Root reports folder
-            base_dir = REPORTS_DIR / student_id
-            relative_path = ""
-        elif clean_path == "students":
-            # Root students folder
-            base_dir = STUDENTS_DIR / student_id
-            relative_path = ""
+        # Determine the base directory from the first path component:
+        # "reports[/...]" or "students[/...]", anything else is inside the student folder
+        head, _, rest = clean_path.partition("/")
+        if head in _BROWSE_ROOTS:
+            kind = head
+            relative_path = rest
         else:
-            # Default to student folder
-            base_dir = STUDENTS_DIR / student_id
+            kind = "students"
             relative_path = clean_path
         
-        # Construct the final path
-        if relative_path:
-            final_path = base_dir / relative_path
-        else:
-            final_path = base_dir
-            
-        # Ensure the path is within the allowed directory
-        final_path = final_path.resolve()
-        base_dir = base_dir.resolve()
+        # The base directory never moves, so its resolved form is cached
+        base_dir, base_str = _resolved_base(kind, student_id)
+        if not relative_path:
+            return base_dir
         
-        if not str(final_path).startswith(str(base_dir)):
+        # Ensure the path (after following symlinks) is within the allowed directory
+        final_path = (base_dir / relative_path).resolve()
+        final_str = str(final_path)
+        if final_str != base_str and not final_str.startswith(base_str + os.sep):
             raise HTTPException(status_code=403, detail="Access denied: Path outside allowed directory")
             
         return final_path
@@ -587,12 +876,27 @@ def validate_path_security(requested_path: str, student_id: str) -> Path:
         logger.error(f"Path validation error: {e}")
         raise HTTPException(status_code=400, detail="Invalid path")
 
+def stat_regular_file(target_path: Path) -> os.stat_result:
+    """Stat a requested file once: 404 if it does not exist, 400 if it is not a regular file"""
+    try:
+        file_stat = target_path.stat()
+    except (FileNotFoundError, NotADirectoryError):
+        raise HTTPException(status_code=404, detail="File not found")
+    if not stat.S_ISREG(file_stat.st_mode):
+        raise HTTPException(status_code=400, detail="Path is not a file")
+    return file_stat
+
 @app.get("/api/files/browse/{student_id}")
-async def browse_student_files(student_id: str, path: str = ""):
-    """Browse files and folders for a specific student"""
+async def browse_student_files(request: Request, student_id: str, path: str = "",
+                               students: Dict[str, Student] = Depends(get_students)):
+    """Browse files and folders for a specific student (polled - honours If-None-Match)"""
+    listing = await _browse_student_files(student_id, path, students)
+    return etag_json_response(request, _dumps(listing))
+
+async def _browse_student_files(student_id: str, path: str, students: Dict[str, Student]) -> dict:
+    """Build the browse listing for a student path"""
     try:
         # Validate student exists
-        students = load_students()
         if student_id not in students:
             raise HTTPException(status_code=404, detail="Student not found")
         
@@ -628,16 +932,16 @@ async def browse_student_files(student_id: str, path: str = ""):
         
         if target_path.is_file():
             # Return file metadata
-            stat = target_path.stat()
-            mime_type, _ = mimetypes.guess_type(str(target_path))
+            file_stat = target_path.stat()
+            mime_type = guess_mime_type(target_path.name)
             
             return {
                 "success": True,
                 "type": "file",
                 "name": target_path.name,
                 "path": path,
-                "size": stat.st_size,
-                "modified": datetime.fromtimestamp(stat.st_mtime).isoformat(),
+                "size": file_stat.st_size,
+                "modified": datetime.fromtimestamp(file_stat.st_mtime).isoformat(),
                 "mime_type": mime_type,
                 "parent": str(target_path.parent.relative_to(target_path.parent.parent)) if target_path.parent != target_path.parent.parent else None
             }
@@ -645,21 +949,31 @@ async def browse_student_files(student_id: str, path: str = ""):
         # Return directory contents
         items = []
         try:
-            for item in sorted(target_path.iterdir(), key=lambda x: (x.is_file(), x.name.lower())):
+            # DirEntry carries the file type from readdir and caches its stat result
+            with os.scandir(target_path) as it:
+                entries = []
+                for entry in it:
+                    try:
+                        entries.append((entry.is_file(), entry.name.lower(), entry))
+                    except OSError as e:
+                        logger.warning(f"Cannot access {entry.path}: {e}")
+            entries.sort(key=lambda e: (e[0], e[1]))
+            
+            for is_file, _, entry in entries:
                 try:
-                    stat = item.stat()
-                    item_path = path + "/" + item.name if path else item.name
+                    entry_stat = entry.stat()
+                    item_path = path + "/" + entry.name if path else entry.name
                     
                     items.append({
-                        "name": item.name,
-                        "type": "file" if item.is_file() else "directory",
+                        "name": entry.name,
+                        "type": "file" if is_file else "directory",
                         "path": item_path,
-                        "size": stat.st_size if item.is_file() else None,
-                        "modified": datetime.fromtimestamp(stat.st_mtime).isoformat(),
-                        "mime_type": mimetypes.guess_type(str(item))[0] if item.is_file() else None
+                        "size": entry_stat.st_size if is_file else None,
+                        "modified": datetime.fromtimestamp(entry_stat.st_mtime).isoformat(),
+                        "mime_type": guess_mime_type(entry.name) if is_file else None
                     })
                 except (OSError, PermissionError) as e:
-                    logger.warning(f"Cannot access {item}: {e}")
+                    logger.warning(f"Cannot access {entry.path}: {e}")
                     continue
         except (OSError, PermissionError) as e:
             logger.error(f"Cannot read directory {target_path}: {e}")
@@ -689,27 +1003,21 @@ async def browse_student_files(student_id: str, path: str = ""):
         raise HTTPException(status_code=500, detail="Failed to browse files")
 
 @app.get("/api/files/content/{student_id}")
-async def get_file_content(student_id: str, path: str):
+async def get_file_content(student_id: str, path: str, students: Dict[str, Student] = Depends(get_students)):
     """Get the content of a specific file for preview"""
     try:
         # Validate student exists
-        students = load_students()
         if student_id not in students:
             raise HTTPException(status_code=404, detail="Student not found")
         
         target_path = validate_path_security(path, student_id)
-        
-        if not target_path.exists():
-            raise HTTPException(status_code=404, detail="File not found")
-        
-        if not target_path.is_file():
-            raise HTTPException(status_code=400, detail="Path is not a file")
+        file_stat = stat_regular_file(target_path)
         
         # Check file size (limit to 1MB for preview)
-        if target_path.stat().st_size > 1024 * 1024:
+        if file_stat.st_size > 1024 * 1024:
             raise HTTPException(status_code=413, detail="File too large for preview")
         
-        mime_type, _ = mimetypes.guess_type(str(target_path))
+        mime_type = guess_mime_type(target_path.name)
         
         # Handle different file types
         if mime_type and mime_type.startswith('text/') or target_path.suffix.lower() in ['.json', '.log', '.txt', '.md']:
@@ -748,27 +1056,22 @@ async def get_file_content(student_id: str, path: str):
         raise HTTPException(status_code=500, detail="Failed to get file content")
 
 @app.get("/api/files/download/{student_id}")
-async def download_file(student_id: str, path: str):
+async def download_file(student_id: str, path: str, students: Dict[str, Student] = Depends(get_students)):
     """Download a specific file"""
     try:
         # Validate student exists
-        students = load_students()
         if student_id not in students:
             raise HTTPException(status_code=404, detail="Student not found")
         
         target_path = validate_path_security(path, student_id)
+        file_stat = stat_regular_file(target_path)
         
-        if not target_path.exists():
-            raise HTTPException(status_code=404, detail="File not found")
-        
-        if not target_path.is_file():
-            raise HTTPException(status_code=400, detail="Path is not a file")
-        
-        # Return the file
+        # Return the file (the stat result saves Starlette another stat)
         return FileResponse(
             path=str(target_path),
             filename=target_path.name,
-            media_type=mimetypes.guess_type(str(target_path))[0]
+            media_type=guess_mime_type(target_path.name),
+            stat_result=file_stat
         )
         
     except HTTPException:
@@ -778,21 +1081,21 @@ async def download_file(student_id: str, path: str):
         raise HTTPException(status_code=500, detail="Failed to download file")
 
 @app.get("/api/health")
-async def health_check():
+def health_check():
     """Health check endpoint"""
     return {
         "status": "healthy",
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": now_iso(),
         "service": "Gemma Tutor API"
     }
 
 @app.get("/api/debug/status")
-async def debug_status():
+def debug_status():
     """Debug endpoint to check all service states"""
     return {
         "service": "Gemma Tutor API",
         "version": "1.0.0",
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": now_iso(),
         "sync_service": {
             "discovery_running": sync_service.is_discovery_running(),
             "discovery_available": sync_service.is_discovery_running()
@@ -808,6 +1111,19 @@ async def debug_status():
         ]
     }
 
+@app.get("/api/ollama/status")
+def get_ollama_status():
+    """Report generation queue depth"""
+    from report_service_factory import get_report_service
+    service = get_report_service()
+    if service is None:
+        raise HTTPException(status_code=503, detail="Report service not available")
+    return {
+        "success": True,
+        **service.get_queue_status(),
+        "timestamp": now_iso()
+    }
+
 # Sync endpoints
 
 @app.post("/api/sync/discovery/start")
@@ -819,7 +1135,7 @@ async def start_discovery_service():
             return {
                 "success": True,
                 "message": "Discovery service started",
-                "timestamp": datetime.now().isoformat()
+                "timestamp": now_iso()
             }
         else:
             raise HTTPException(status_code=500, detail="Failed to start discovery service")
@@ -836,7 +1152,7 @@ async def stop_discovery_service():
             return {
                 "success": True,
                 "message": "Discovery service stopped",
-                "timestamp": datetime.now().isoformat()
+                "timestamp": now_iso()
             }
         else:
             raise HTTPException(status_code=500, detail="Failed to stop discovery service")
@@ -850,58 +1166,230 @@ async def get_discovery_status():
     return {
         "success": True,
         "is_running": sync_service.is_discovery_running(),
-        "timestamp": datetime.now().isoformat()
+        "timestamp": now_iso()
     }
 
+# The /api/sync/discover payload is serialized once; only "available" and
+# "timestamp" are spliced in per request
+_DISCOVER_PREFIX = _dumps({
+    "service": "Gemma Tutor API",
+    "version": "1.0.0",
+    "endpoints": {
+        "sync_from_student": "/api/sync/from-student",
+        "get_content": "/api/sync/content"
+    },
+    "content_encodings": SYNC_CONTENT_ENCODINGS
+})[:-1]  # drop the closing brace
+_DISCOVER_AVAILABLE = _DISCOVER_PREFIX + b',"available":true,"timestamp":"'
+_DISCOVER_UNAVAILABLE = _DISCOVER_PREFIX + b',"available":false,"timestamp":"'
+
 @app.get("/api/sync/discover")
 async def discover_service():
     """Discovery endpoint for student-app to find this tutor service"""
-    return {
-        "service": "Gemma Tutor API",
-        "version": "1.0.0",
-        "available": sync_service.is_discovery_running(),
-        "timestamp": datetime.now().isoformat(),
-        "endpoints": {
-            "sync_from_student": "/api/sync/from-student",
-            "get_content": "/api/sync/content"
-        }
-    }
+    head = _DISCOVER_AVAILABLE if sync_service.is_discovery_running() else _DISCOVER_UNAVAILABLE
+    return Response(content=head + now_iso().encode() + b'"}', media_type="application/json")
+
+# Upper bound on a decompressed sync upload (guards against decompression bombs)
+_MAX_SYNC_BODY_SIZE = int(os.environ.get("SYNC_MAX_BODY_BYTES", str(256 * 1024 * 1024)))
+_DECODE_CHUNK_SIZE = 1024 * 1024
+
+def decode_request_body(body: bytes, content_encoding: Optional[str]) -> bytes:
+    """Undo the Content-Encoding of a compressed sync upload (413 past _MAX_SYNC_BODY_SIZE)"""
+    encoding = (content_encoding or "identity").strip().lower()
+    if encoding == "identity":
+        return body
+    if encoding not in SYNC_CONTENT_ENCODINGS:
+        raise HTTPException(status_code=415, detail=f"Unsupported Content-Encoding: {content_encoding}")
+    
+    try:
+        if encoding == "zstd":
+            reader = zstandard.ZstdDecompressor().stream_reader(io.BytesIO(body))
+        else:
+            reader = gzip.GzipFile(fileobj=io.BytesIO(body), mode='rb')
+        
+        # Decompress in bounded chunks so the output never grows past the limit
+        decoded = bytearray()
+        with reader:
+            while True:
+                chunk = reader.read(_DECODE_CHUNK_SIZE)
+                if not chunk:
+                    break
+                decoded += chunk
+                if len(decoded) > _MAX_SYNC_BODY_SIZE:
+                    raise HTTPException(status_code=413, detail="Decompressed request body too large")
+        return bytes(decoded)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Could not decode {encoding} request body: {e}")
 
-@app.post("/api/sync/from-student")
-async def sync_from_student(sync_request: SyncRequest) -> SyncResponse:
-    """Receive sync data from student-app"""
+# Concurrent student syncs (foreground and background) are bounded so a burst of
+# students cannot saturate disk I/O; created on first use inside the server's loop
+SYNC_MAX_CONCURRENCY = int(os.environ.get("SYNC_MAX_CONCURRENCY", "4"))
+_sync_semaphore: Optional[asyncio.Semaphore] = None
+
+# task_id -> (created monotonic time, task) for syncs accepted with 202
+_sync_tasks: Dict[str, Tuple[float, asyncio.Task]] = {}
+_SYNC_TASK_RETENTION = 600.0  # seconds a finished task stays queryable
+
+async def _run_sync(sync_request: SyncRequest, content_fingerprint: Optional[str] = None) -> SyncResponse:
+    """Run one student sync under the concurrency limit"""
+    global _sync_semaphore
+    if _sync_semaphore is None:
+        _sync_semaphore = asyncio.Semaphore(SYNC_MAX_CONCURRENCY)
+    async with _sync_semaphore:
+        response = await sync_service.sync_from_student(sync_request, content_fingerprint)
+    logger.info(f"Successfully synced data from student {sync_request.student_id}")
+    return response
+
+def _sync_task_done(task: asyncio.Task) -> None:
+    """Log background sync failures (also marks the exception as retrieved)"""
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Error in background sync: {task.exception()}")
+
+def _prune_sync_tasks() -> None:
+    """Forget finished background syncs older than the retention window"""
+    cutoff = time.monotonic() - _SYNC_TASK_RETENTION
+    for task_id, (created, task) in list(_sync_tasks.items()):
+        if created < cutoff and task.done():
+            del _sync_tasks[task_id]
+
+@app.post("/api/sync/from-student", response_model=SyncResponse)
+async def sync_from_student(request: Request) -> SyncResponse:
+    """
+    Receive sync data from student-app (optionally zstd/gzip compressed)
+    
+    Clients sending "Prefer: respond-async" get 202 Accepted with a task id right away
+    and poll /api/sync/status/{task_id}; others wait for the SyncResponse as before.
+    
+    A full sync may name its content tree in X-Content-Fingerprint. A sync that leaves
+    the content out sends that fingerprint back in If-Match and gets 412 when this tutor
+    no longer holds the matching content (student deleted, tutor restarted, another tutor).
+    """
     try:
         if not sync_service.is_discovery_running():
             raise HTTPException(status_code=503, detail="Discovery service not running")
         
-        response = await sync_service.sync_from_student(sync_request)
-        logger.info(f"Successfully synced data from student {sync_request.student_id}")
-        return response
-    except HTTPException:
+        # Decompression (up to _MAX_SYNC_BODY_SIZE) and validation run on the I/O pool
+        body = await run_io(decode_request_body, await request.body(), request.headers.get("content-encoding"))
+        try:
+            sync_request = await run_io(SyncRequest.model_validate_json, body)
+        except ValidationError as e:
+            raise RequestValidationError(e.errors())
+        
+        if_match = request.headers.get("if-match")
+        if if_match is not None and not sync_service.content_fingerprint_matches(
+                sync_request.student_id, if_match.strip().strip('"')):
+            raise HTTPException(status_code=412, detail="Content not held by this tutor - send a full sync")
+        content_fingerprint = request.headers.get("x-content-fingerprint")
+        
+        if "respond-async" in request.headers.get("prefer", "").lower():
+            _prune_sync_tasks()
+            task_id = uuid.uuid4().hex
+            task = asyncio.ensure_future(_run_sync(sync_request, content_fingerprint))
+            task.add_done_callback(_sync_task_done)
+            _sync_tasks[task_id] = (time.monotonic(), task)
+            return JSONResponse(status_code=202, content={
+                "success": True,
+                "message": "Sync accepted",
+                "task_id": task_id,
+                "status_url": f"/api/sync/status/{task_id}"
+            })
+        
+        return await _run_sync(sync_request, content_fingerprint)
+    except (HTTPException, RequestValidationError):
         raise
     except Exception as e:
         logger.error(f"Error in sync from student: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/sync/status/{task_id}")
+async def get_sync_status(task_id: str):
+    """Status of a sync accepted with 202 (the SyncResponse once it has completed)"""
+    entry = _sync_tasks.get(task_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Sync task not found")
+    
+    task = entry[1]
+    if not task.done():
+        return {"success": True, "task_id": task_id, "status": "pending"}
+    if task.cancelled():
+        return {"success": False, "task_id": task_id, "status": "failed", "error": "Sync was cancelled"}
+    
+    error = task.exception()
+    if error is not None:
+        detail = error.detail if isinstance(error, HTTPException) else str(error)
+        return {"success": False, "task_id": task_id, "status": "failed", "error": detail}
+    return {"success": True, "task_id": task_id, "status": "completed", "result": task.result()}
+
 @app.get("/api/sync/content/{student_id}")
-async def get_content_for_student(student_id: str):
-    """Get content that should be synced to student"""
+async def get_content_for_student(student_id: str, manifest: bool = False):
+    """
+    Get content that should be synced to student
+    
+    With ?manifest=true only file names, sizes and download URLs are returned;
+    each file is then fetched from /api/sync/content/{student_id}/file/{name}.
+    """
     try:
         if not sync_service.is_discovery_running():
             raise HTTPException(status_code=503, detail="Discovery service not running")
         
-        content_data = await sync_service.get_content_for_student(student_id)
+        if manifest:
+            content_data = await sync_service.get_content_manifest(student_id)
+            for entry in content_data["files"]:
+                entry["url"] = f"/api/sync/content/{quote(student_id)}/file/{quote(entry['name'])}"
+        else:
+            content_data = await sync_service.get_content_for_student(student_id)
         return {
             "success": True,
             "student_id": student_id,
             "content": content_data,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": now_iso()
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting content for student {student_id}: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/sync/content/{student_id}/file/{filename}")
+def get_content_file_for_student(request: Request, student_id: str, filename: str,
+                                 students: Dict[str, Student] = Depends(get_students)):
+    """Send one assigned content file (ETag/Last-Modified for caching)"""
+    if not sync_service.is_discovery_running():
+        raise HTTPException(status_code=503, detail="Discovery service not running")
+    
+    student = students.get(student_id)
+    if student is None:
+        raise HTTPException(status_code=404, detail="Student not found")
+    if filename != os.path.basename(filename) or filename not in student._assigned_set:
+        raise HTTPException(status_code=404, detail="File not assigned to this student")
+    
+    content_path = CONTENT_DIR / filename
+    file_stat = stat_regular_file(content_path)
+    response = FileResponse(
+        path=str(content_path),
+        media_type=guess_mime_type(filename),
+        stat_result=file_stat
+    )
+    
+    etag = response.headers["etag"]
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    return response
+
+
 if __name__ == "__main__":
-    logger.info("Starting Gemma Tutor API server on port 8001")
-    uvicorn.run(app, host="0.0.0.0", port=8001)
\ No newline at end of file
+    # One worker by default: discovery state and the students cache live in-process,
+    # so extra workers (WORKERS env var) each run their own copy
+    workers = int(os.environ.get("WORKERS", "1"))
+    logger.info(f"Starting Gemma Tutor API server on port 8001 ({workers} worker(s))")
+    uvicorn.run(
+        "api_server:app" if workers > 1 else app,
+        host="0.0.0.0",
+        port=8001,
+        loop="uvloop" if UVLOOP_AVAILABLE else "asyncio",
+        http="httptools" if HTTPTOOLS_AVAILABLE else "h11",
+        workers=workers
+    )
\ No newline at end of file
@@ -9,14 +9,18 @@ import logging
 import os
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 import aiofiles
+import aiofiles.os
 from fastapi import HTTPException
 from pydantic import BaseModel
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of content files read at once when preparing a student's sync
+CONTENT_READ_CONCURRENCY = 32
+
 class SyncRequest(BaseModel):
     student_id: str
     student_data: Dict
@@ -34,6 +38,11 @@ class SyncService:
         self.students_dir = students_dir
         self.content_dir = content_dir
         self.is_discovery_active = False
+        # filename -> (st_mtime_ns, st_size, text) of content files sent to students
+        self._content_cache: Dict[str, Tuple[int, int, str]] = {}
+        # student_id -> fingerprint of the content tree the student last sent in full;
+        # a logs-only sync is refused (412) unless it names the fingerprint held here
+        self._content_fingerprints: Dict[str, str] = {}
         
     def start_discovery_service(self) -> bool:
         """Start the network discovery service"""
@@ -56,13 +65,26 @@ class SyncService:
             return False
     
     def is_discovery_running(self) -> bool:
-        """Check if discovery service is running"""
+        """Check if discovery service is running (a plain flag read - safe on every request)"""
         return self.is_discovery_active
     
-    async def sync_from_student(self, sync_request: SyncRequest) -> SyncResponse:
+    def content_fingerprint_matches(self, student_id: str, fingerprint: str) -> bool:
+        """Whether the tutor still holds the content the student sent under this fingerprint"""
+        return (self._content_fingerprints.get(student_id) == fingerprint
+                and (self.students_dir / student_id).is_dir())
+    
+    def forget_content_fingerprint(self, student_id: str) -> None:
+        """Make the student's next logs-only sync fall back to a full one (e.g. after deletion)"""
+        self._content_fingerprints.pop(student_id, None)
+    
+    async def sync_from_student(self, sync_request: SyncRequest,
+                                content_fingerprint: Optional[str] = None) -> SyncResponse:
         """
         Sync data from student to tutor
         Copies logs, generated content, submissions, and discovery data
+        
+        content_fingerprint identifies a full sync's content tree; it is remembered so
+        later logs-only syncs can be checked against it
         """
         try:
             student_id = sync_request.student_id
@@ -114,6 +136,9 @@ class SyncService:
             # Get content that should be removed (no longer assigned)
             removed_content = await self._get_removed_content(student_id, sync_request.content_data.get('current_content', []))
             
+            if content_fingerprint:
+                self._content_fingerprints[student_id] = content_fingerprint
+            
             # Prepare sync response 
             sync_response = SyncResponse(
                 success=True,
@@ -810,18 +835,66 @@ xAPI LOGS TO ANALYZE:
         
         return '\n\n'.join(formatted_paragraphs)
     
+    async def _read_content_file(self, filename: str, semaphore: asyncio.Semaphore) -> Optional[str]:
+        """Read a content file, reusing the cached text while its mtime and size are unchanged"""
+        content_file = self.content_dir / filename
+        try:
+            st = os.stat(content_file)
+        except FileNotFoundError:
+            return None
+        
+        cached = self._content_cache.get(filename)
+        if cached is not None and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+            return cached[2]
+        
+        async with semaphore:
+            try:
+                async with aiofiles.open(content_file, 'r', encoding='utf-8') as f:
+                    content = await f.read()
+            except FileNotFoundError:
+                return None
+        self._content_cache[filename] = (st.st_mtime_ns, st.st_size, content)
+        return content
+    
+    async def _stat_content_file(self, filename: str) -> Optional[os.stat_result]:
+        """Stat a content file without blocking the loop (None if it is gone)"""
+        try:
+            return await aiofiles.os.stat(self.content_dir / filename)
+        except FileNotFoundError:
+            return None
+    
+    async def get_content_manifest(self, student_id: str) -> Dict:
+        """List the student's assigned content files with size and modification time (no contents)"""
+        try:
+            assigned_files = await self._get_assigned_content(student_id)
+            stats = await asyncio.gather(*(self._stat_content_file(f) for f in assigned_files))
+            return {
+                'assigned_files': assigned_files,
+                'files': [
+                    {'name': filename, 'size': st.st_size, 'modified': st.st_mtime}
+                    for filename, st in zip(assigned_files, stats)
+                    if st is not None
+                ]
+            }
+        except Exception as e:
+            logger.error(f"Error building content manifest for student {student_id}: {e}")
+            return {'assigned_files': [], 'files': []}
+    
     async def get_content_for_student(self, student_id: str) -> Dict:
         """Get content files that should be sent to student"""
         try:
             assigned_files = await self._get_assigned_content(student_id)
-            content_data = {}
-            
-            for filename in assigned_files:
-                content_file = self.content_dir / filename
-                if content_file.exists():
-                    async with aiofiles.open(content_file, 'r', encoding='utf-8') as f:
-                        content = await f.read()
-                    content_data[filename] = content
+            
+            # Read the assigned files concurrently; missing files are skipped
+            semaphore = asyncio.Semaphore(CONTENT_READ_CONCURRENCY)
+            contents = await asyncio.gather(*(
+                self._read_content_file(filename, semaphore) for filename in assigned_files
+            ))
+            content_data = {
+                filename: content
+                for filename, content in zip(assigned_files, contents)
+                if content is not None
+            }
             
             return {
                 'assigned_files': assigned_files,